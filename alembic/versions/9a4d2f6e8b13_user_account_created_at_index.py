@@ -0,0 +1,30 @@
+"""user_account created_at index
+
+Revision ID: 9a4d2f6e8b13
+Revises: 3c9e1b7d52a4
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9a4d2f6e8b13"
+down_revision: str | None = "3c9e1b7d52a4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_user_account_created_at_id",
+        "user_account",
+        ["created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_account_created_at_id", table_name="user_account")
@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from bench.env import setup_env
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m bench",
+        description="Load benchmark for the auth_router endpoints",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["fake", "local"],
+        default="fake",
+        help="fake: in-process Redis and repository; "
+        "local: Postgres and Redis from the environment",
+    )
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument(
+        "--mix",
+        type=json.loads,
+        default=None,
+        help='action weights, e.g. \'{"protected": 90, "access_token": 10}\'',
+    )
+    parser.add_argument(
+        "--rate-limits",
+        action="store_true",
+        help="keep rate limiting on; all virtual clients share one IP",
+    )
+    parser.add_argument("--output", default="bench_report.json")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.mode == "fake":
+        setup_env()
+
+    from bench.fakes import install_fakes, stub_email
+    from bench.load import run_load
+    from src.main import create_app
+
+    app = create_app()
+
+    if args.mode == "fake":
+        install_fakes(app)
+    stub_email()
+    if not args.rate_limits:
+        from src.auth.ratelimit import rate_limiter
+
+        rate_limiter.policies = {}
+
+    report = asyncio.run(run_load(app, args.clients, args.duration, args.mix))
+    report["mode"] = args.mode
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    total = report["total"]
+    print(
+        f"{total['count']} requests in {report['duration']:.1f}s, "
+        f"{total['rps']:.1f} rps, error rate {total['error_rate']:.2%}",
+        file=sys.stderr,
+    )
+    for route, stats in report["routes"].items():
+        latency = stats["latency_ms"]
+        print(
+            f"{route:40} {stats['rps']:8.1f} rps  "
+            f"p50 {latency['p50']:7.1f}ms  p99 {latency['p99']:7.1f}ms  "
+            f"errors {stats['error_rate']:.2%}",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
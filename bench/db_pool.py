@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from uuid import uuid4
+
+from bench.env import setup_env
+from bench.load import RouteStats
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m bench.db_pool",
+        description="Compare direct Postgres connections with PgBouncer "
+        "transaction pooling under the hot user lookup",
+    )
+    parser.add_argument(
+        "--direct-url", default=None, help="defaults to POSTGRES_URL"
+    )
+    parser.add_argument(
+        "--pooled-url",
+        required=True,
+        help="PgBouncer URL, e.g. postgresql+asyncpg://u:p@localhost:6432/db",
+    )
+    parser.add_argument(
+        "--replicas",
+        type=int,
+        default=8,
+        help="API processes to simulate; each gets its own engine",
+    )
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--output", default="bench_db_pool.json")
+    return parser.parse_args()
+
+
+async def sample_connections(engine, stop: asyncio.Event) -> int:
+    from sqlalchemy import text
+
+    peak = 0
+    query = text(
+        "SELECT count(*) FROM pg_stat_activity "
+        "WHERE datname = current_database()"
+    )
+    while not stop.is_set():
+        async with engine.connect() as conn:
+            peak = max(peak, await conn.scalar(query))
+        await asyncio.sleep(0.5)
+    return peak
+
+
+async def run_mode(
+    mode: str,
+    url: str,
+    direct_url: str,
+    replicas: int,
+    pool_size: int,
+    concurrency: int,
+    duration: float,
+) -> dict:
+    from sqlalchemy import select
+
+    from src.database import new_async_engine
+    from src.model import User
+
+    engines = [
+        new_async_engine(
+            f"{mode}{i}", url, pool_size, max_overflow=0, pool_mode=mode
+        )
+        for i in range(replicas)
+    ]
+    sampler = new_async_engine("sampler", direct_url, 1, 0, "direct")
+    stop = asyncio.Event()
+    peak = asyncio.create_task(sample_connections(sampler, stop))
+    stats = RouteStats()
+    errors: list[str] = []
+    deadline = time.perf_counter() + duration
+
+    async def worker(engine) -> None:
+        # Distinct misses still go through parse/prepare/execute.
+        while time.perf_counter() < deadline:
+            stmt = select(User.id, User.password).where(
+                User.email == f"bench-{uuid4().hex}@example.com"
+            )
+            started_at = time.perf_counter()
+            ok = True
+            try:
+                async with engine.connect() as conn:
+                    await conn.execute(stmt)
+            except Exception as exc:
+                ok = False
+                errors.append(repr(exc))
+            stats.observe(time.perf_counter() - started_at, None, ok)
+
+    started_at = time.perf_counter()
+    try:
+        await asyncio.gather(
+            *(worker(engines[i % replicas]) for i in range(concurrency))
+        )
+    finally:
+        stop.set()
+        for engine in engines:
+            await engine.dispose()
+    report = stats.report(time.perf_counter() - started_at)
+    report["server_connections_peak"] = await peak
+    report["first_error"] = errors[0] if errors else None
+    await sampler.dispose()
+    return report
+
+
+def main() -> None:
+    args = parse_args()
+    setup_env()
+
+    from src.config import config
+
+    direct_url = args.direct_url or config.POSTGRES_URL
+    report = {}
+    for mode, url in (("direct", direct_url), ("pgbouncer", args.pooled_url)):
+        report[mode] = asyncio.run(
+            run_mode(
+                mode,
+                url,
+                direct_url,
+                args.replicas,
+                args.pool_size,
+                args.concurrency,
+                args.duration,
+            )
+        )
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    for mode, stats in report.items():
+        latency = stats["latency_ms"]
+        print(
+            f"{mode:10} {stats['rps']:8.1f} qps  "
+            f"p50 {latency['p50']:7.1f}ms  p99 {latency['p99']:7.1f}ms  "
+            f"errors {stats['error_rate']:.2%}  "
+            f"server connections {stats['server_connections_peak']}",
+            file=sys.stderr,
+        )
+        if stats["first_error"]:
+            print(f"  first error: {stats['first_error']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
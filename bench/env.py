@@ -0,0 +1,17 @@
+import os
+
+from cryptography.fernet import Fernet
+
+BENCH_ENV = {
+    "LOG_LEVEL": "WARNING",
+    "TOKEN_LIFE": "900",
+    "REFRESH_TOKEN_LIFE": "86400",
+    "JWT_SECRET": "bench-secret-bench-secret-bench-secret",
+    "CRYPT_KEY": Fernet.generate_key().decode(),
+    "TOKEN_FINGERPRINT_KEY": "bench-fingerprint-key",
+}
+
+
+def setup_env() -> None:
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
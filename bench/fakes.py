@@ -0,0 +1,150 @@
+from datetime import UTC, datetime
+from uuid import UUID, uuid4
+
+from fastapi import FastAPI
+
+from src.email_celery.backend import EmailBackend
+from src.model import User
+from src.repository import (
+    AbstractRepository,
+    UserCredentials,
+    UserRepository,
+    _user_read,
+)
+from src.schema import UserCreate, UserRead
+
+
+class FakeSession:
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        pass
+
+    async def flush(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        pass
+
+
+class InMemoryUserRepository(AbstractRepository):
+    users: dict[UUID, User] = {}
+    emails: dict[str, UUID] = {}
+
+    @staticmethod
+    async def get(user_id: UUID, session) -> UserRead | None:
+        user = InMemoryUserRepository.users.get(user_id)
+        if user is None:
+            return None
+        return _user_read(user)
+
+    @staticmethod
+    async def get_many(user_ids: list[UUID], session) -> list[UserRead]:
+        users = InMemoryUserRepository.users
+        return [_user_read(users[i]) for i in user_ids if i in users]
+
+    @staticmethod
+    async def get_by_email(email: str, session) -> UserRead | None:
+        user_id = InMemoryUserRepository.emails.get(email)
+        if user_id is None:
+            return None
+        return _user_read(InMemoryUserRepository.users[user_id])
+
+    @staticmethod
+    async def get_credentials(email: str, session) -> UserCredentials | None:
+        user_id = InMemoryUserRepository.emails.get(email)
+        if user_id is None:
+            return None
+        user = InMemoryUserRepository.users[user_id]
+        return UserCredentials(
+            user.id, user.email, user.first_name, user.password
+        )
+
+    @staticmethod
+    async def add(user: UserCreate, session) -> UserRead:
+        user_model = User(
+            id=uuid4(),
+            email=user.email,
+            password=user.password,
+            first_name=user.first_name,
+            created_at=datetime.now(UTC),
+        )
+        InMemoryUserRepository.users[user_model.id] = user_model
+        InMemoryUserRepository.emails[user_model.email] = user_model.id
+        return UserRead.model_validate(user_model, from_attributes=True)
+
+    @staticmethod
+    async def set_password(user_id: UUID, password: str, session) -> None:
+        InMemoryUserRepository.users[user_id].password = password
+
+    @staticmethod
+    async def list(session, limit=100, after=None) -> list[User]:
+        users = sorted(
+            InMemoryUserRepository.users.values(),
+            key=lambda user: (user.created_at, user.id),
+        )
+        if after is not None:
+            users = [u for u in users if (u.created_at, u.id) > after]
+        return users[:limit]
+
+    @staticmethod
+    async def iterate(session, page_size=1000):
+        for user in await InMemoryUserRepository.list(
+            session, len(InMemoryUserRepository.users)
+        ):
+            yield user
+
+
+async def fake_session():
+    yield FakeSession()
+
+
+class NullEmailBackend(EmailBackend):
+    name = "null"
+
+    def send(
+        self,
+        user_email: str,
+        template_id: str,
+        variables: dict[str, str],
+        session=None,
+    ) -> bool:
+        return True
+
+
+def install_fakes(app: FastAPI) -> None:
+    from fakeredis import FakeAsyncRedis
+
+    from src.auth.transport import set_redis
+    from src.dependencies import async_get_session
+
+    set_redis(FakeAsyncRedis(decode_responses=True))
+    for name in (
+        "get",
+        "get_many",
+        "get_by_email",
+        "get_credentials",
+        "add",
+        "set_password",
+        "list",
+        "iterate",
+    ):
+        setattr(
+            UserRepository,
+            name,
+            staticmethod(getattr(InMemoryUserRepository, name)),
+        )
+    app.dependency_overrides[async_get_session] = fake_session
+
+
+def stub_email() -> None:
+    from src.auth import service
+
+    service.email_backend = NullEmailBackend()
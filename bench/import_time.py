@@ -0,0 +1,73 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+from bench.env import BENCH_ENV
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|\s+(\S+)")
+
+
+# Readiness is the import plus the app factory: routers, the ORM and the
+# auth stack are only imported inside create_app().
+_SCRIPT = """
+import time
+started_at = time.perf_counter()
+import {module} as target
+if {factory!r}:
+    getattr(target, {factory!r})()
+print(int((time.perf_counter() - started_at) * 1e6))
+"""
+
+
+def measure(module: str, factory: str) -> tuple[int, list[tuple[int, str]]]:
+    env = {**BENCH_ENV, **os.environ}
+    script = _SCRIPT.format(module=module, factory=factory)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match is not None:
+            own, _, name = match.groups()
+            modules.append((int(own), name))
+    return int(result.stdout.split()[-1]), modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m bench.import_time",
+        description="Check the startup time of the app against a budget",
+    )
+    parser.add_argument("--module", default="src.main")
+    parser.add_argument(
+        "--factory",
+        default="create_app",
+        help="called after the import; pass '' to time the import alone",
+    )
+    parser.add_argument("--budget-ms", type=float, default=1200.0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [measure(args.module, args.factory) for _ in range(args.runs)]
+    total, modules = min(runs, key=lambda run: run[0])
+    total_ms = total / 1000
+
+    target = args.module + (f":{args.factory}()" if args.factory else "")
+    print(f"{target}: {total_ms:.1f}ms (budget {args.budget_ms}ms)")
+    for own, name in sorted(modules, reverse=True)[: args.top]:
+        print(f"  {own / 1000:8.1f}ms  {name}")
+
+    if total_ms > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import asyncio
+import random
+import time
+from collections import defaultdict
+from uuid import uuid4
+
+import httpx
+from fastapi import FastAPI
+
+AGENTS = [
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/129.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_6) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/17.6 Safari/605.1.15",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_6 like Mac OS X) "
+    "AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148",
+]
+
+# Weighted mix of actions a logged-in client performs.
+DEFAULT_MIX = {
+    "protected": 65,
+    "access_token": 15,
+    "refresh": 5,
+    "register": 5,
+    "forgot_password": 5,
+    "verification": 5,
+}
+
+
+class RouteStats:
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.errors = 0
+        self.statuses: dict[int, int] = defaultdict(int)
+
+    def observe(self, latency: float, status: int | None, ok: bool) -> None:
+        self.latencies.append(latency)
+        if status is not None:
+            self.statuses[status] += 1
+        if not ok:
+            self.errors += 1
+
+    def report(self, duration: float) -> dict:
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        return {
+            "count": count,
+            "rps": count / duration if duration else 0.0,
+            "errors": self.errors,
+            "error_rate": self.errors / count if count else 0.0,
+            "statuses": dict(self.statuses),
+            "latency_ms": {
+                "mean": sum(latencies) / count * 1000 if count else 0.0,
+                "p50": percentile(latencies, 50) * 1000,
+                "p90": percentile(latencies, 90) * 1000,
+                "p99": percentile(latencies, 99) * 1000,
+                "max": latencies[-1] * 1000 if count else 0.0,
+            },
+        }
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, round(pct / 100 * len(values)) - 1))
+    return values[rank]
+
+
+class VirtualClient:
+    def __init__(
+        self, http: httpx.AsyncClient, stats: dict[str, RouteStats]
+    ) -> None:
+        self.http = http
+        self.stats = stats
+        self.agent = random.choice(AGENTS)
+        self.email = f"bench-{uuid4().hex}@example.com"
+        self.password = uuid4().hex
+        self.access_token: str | None = None
+
+    async def request(
+        self, route: str, method: str, url: str, expected: int, **kwargs
+    ) -> httpx.Response | None:
+        headers = kwargs.pop("headers", {})
+        headers["user-agent"] = self.agent
+        if self.access_token is not None:
+            headers.setdefault("authorization", f"Bearer {self.access_token}")
+        started_at = time.perf_counter()
+        try:
+            response = await self.http.request(
+                method, url, headers=headers, **kwargs
+            )
+        except Exception:
+            self.stats[route].observe(
+                time.perf_counter() - started_at, None, False
+            )
+            return None
+        self.stats[route].observe(
+            time.perf_counter() - started_at,
+            response.status_code,
+            response.status_code == expected,
+        )
+        return response
+
+    async def register(self, email: str | None = None) -> None:
+        await self.request(
+            "POST /auth/register",
+            "POST",
+            "/auth/register",
+            201,
+            json={
+                "first_name": "Bench",
+                "email": email or f"bench-{uuid4().hex}@example.com",
+                "password": self.password,
+            },
+        )
+
+    async def login(self) -> None:
+        response = await self.request(
+            "POST /auth/access-token",
+            "POST",
+            "/auth/access-token",
+            200,
+            data={"username": self.email, "password": self.password},
+        )
+        if response is not None and response.status_code == 200:
+            self.access_token = response.json()["access_token"]
+
+    async def protected(self) -> None:
+        await self.request(
+            "GET /auth/protected", "GET", "/auth/protected", 200
+        )
+
+    async def refresh(self) -> None:
+        response = await self.request(
+            "POST /auth/refresh", "POST", "/auth/refresh", 200
+        )
+        if response is not None and response.status_code == 200:
+            self.access_token = response.json()["access_token"]
+
+    async def forgot_password(self) -> None:
+        await self.request(
+            "POST /auth/request-forgot-password",
+            "POST",
+            "/auth/request-forgot-password",
+            202,
+            json=self.email,
+        )
+
+    async def verification(self) -> None:
+        await self.request(
+            "POST /auth/verification", "POST", "/auth/verification", 202
+        )
+
+    async def run(self, deadline: float, mix: dict[str, int]) -> None:
+        await self.register(self.email)
+        await self.login()
+        actions = {
+            "protected": self.protected,
+            "access_token": self.login,
+            "refresh": self.refresh,
+            "register": self.register,
+            "forgot_password": self.forgot_password,
+            "verification": self.verification,
+        }
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        while time.perf_counter() < deadline:
+            action = random.choices(names, weights)[0]
+            await actions[action]()
+
+
+async def run_load(
+    app: FastAPI,
+    clients: int,
+    duration: float,
+    mix: dict[str, int] | None = None,
+) -> dict:
+    stats: dict[str, RouteStats] = defaultdict(RouteStats)
+    transport = httpx.ASGITransport(app=app)
+    async with (
+        app.router.lifespan_context(app),
+        httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as http,
+    ):
+        started_at = time.perf_counter()
+        deadline = started_at + duration
+        await asyncio.gather(
+            *(
+                VirtualClient(http, stats).run(deadline, mix or DEFAULT_MIX)
+                for _ in range(clients)
+            )
+        )
+        elapsed = time.perf_counter() - started_at
+
+    total = RouteStats()
+    for route_stats in stats.values():
+        total.latencies.extend(route_stats.latencies)
+        total.errors += route_stats.errors
+        for code, count in route_stats.statuses.items():
+            total.statuses[code] += count
+
+    return {
+        "clients": clients,
+        "duration": elapsed,
+        "total": total.report(elapsed),
+        "routes": {
+            route: route_stats.report(elapsed)
+            for route, route_stats in sorted(stats.items())
+        },
+    }
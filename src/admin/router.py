@@ -0,0 +1,38 @@
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+
+from src.database import get_read_session, get_session
+from src.dependencies import AdminKeyDep
+from src.repository import UserRepository
+from src.schema import UserRead
+
+admin_router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+async def _users_ndjson(page_size: int) -> AsyncIterator[bytes]:
+    # The response outlives request dependencies, so the stream owns
+    # its session.
+    async with get_read_session() or get_session() as session:
+        lines = []
+        async for user in UserRepository.iterate(session, page_size):
+            lines.append(
+                UserRead.model_validate(user, from_attributes=True)
+                .model_dump_json()
+                .encode()
+            )
+            if len(lines) == page_size:
+                yield b"\n".join(lines) + b"\n"
+                lines = []
+        if lines:
+            yield b"\n".join(lines) + b"\n"
+
+
+@admin_router.get("/users", dependencies=[AdminKeyDep])
+async def list_users(
+    page_size: int = Query(default=1000, ge=1, le=10000),
+) -> StreamingResponse:
+    return StreamingResponse(
+        _users_ndjson(page_size), media_type="application/x-ndjson"
+    )
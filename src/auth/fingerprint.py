@@ -0,0 +1,28 @@
+import base64
+import hashlib
+import hmac
+
+# Kept free of src.config so src.auth.verifier can use it standalone.
+
+
+def derive_key(secret: str) -> bytes:
+    return hmac.new(
+        secret.encode(), b"token-fingerprint", hashlib.sha256
+    ).digest()
+
+
+def _encode(digest: bytes) -> str:
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def session_fingerprint(key: bytes, refresh_token: str) -> str:
+    digest = hmac.new(key, b"s:" + refresh_token.encode(), hashlib.sha256)
+    return _encode(digest.digest()[:16])
+
+
+def agent_fingerprint(agent: str) -> str:
+    # Unkeyed: the agent was never secret (legacy tokens carry it in
+    # clear), and this way downstream verifiers can check the binding
+    # with nothing but the JWKS.
+    digest = hashlib.sha256(b"a:" + agent.encode()).digest()
+    return _encode(digest[:12])
@@ -0,0 +1,123 @@
+import asyncio
+import time
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+
+from fastapi import HTTPException, status
+
+from src.auth.util import get_password_hash, verify_password
+from src.config import config
+from src.logging_config import logger
+from src.metrics import password_hash_duration, password_hash_wait
+
+
+class HasherStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.rejected = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.total_wait = 0.0
+
+    def observe(self, wait: float, elapsed: float) -> None:
+        self.calls += 1
+        self.total_wait += wait
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+
+    def as_dict(self) -> dict[str, float | int]:
+        return {
+            "calls": self.calls,
+            "rejected": self.rejected,
+            "avg_time": self.total_time / self.calls if self.calls else 0.0,
+            "max_time": self.max_time,
+            "avg_wait": self.total_wait / self.calls if self.calls else 0.0,
+        }
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        executor_type: str = config.PASSWORD_HASH_EXECUTOR,
+        max_workers: int = config.PASSWORD_HASH_WORKERS,
+        max_pending: int = config.PASSWORD_HASH_MAX_PENDING,
+    ) -> None:
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.stats = HasherStats()
+        self._executor: Executor | None = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="bcrypt"
+                )
+        return self._executor
+
+    async def _run(self, operation: str, func, *args):
+        if self.pending >= self.max_pending:
+            self.stats.rejected += 1
+            logger.warning(
+                "Password hasher queue is full", pending=self.pending
+            )
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, try again later",
+            )
+        self.pending += 1
+        queued_at = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, elapsed = await loop.run_in_executor(
+                self.executor, _timed_call, func, *args
+            )
+        finally:
+            self.pending -= 1
+        total = time.perf_counter() - queued_at
+        self.stats.observe(total - elapsed, elapsed)
+        password_hash_wait.observe(total - elapsed, operation)
+        password_hash_duration.observe(elapsed, operation)
+        return result
+
+    async def hash_password(self, password: str) -> str:
+        return await self._run("hash", get_password_hash, password)
+
+    async def check_password(
+        self, plain_password: str, hashed_password: str
+    ) -> bool:
+        return await self._run(
+            "check", verify_password, plain_password, hashed_password
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def _timed_call(func, *args):
+    started_at = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started_at
+
+
+password_hasher = PasswordHasher()
+
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash_password(password)
+
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.check_password(
+        plain_password, hashed_password
+    )
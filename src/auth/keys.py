@@ -0,0 +1,141 @@
+import argparse
+import json
+from pathlib import Path
+from typing import Any
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jwt.algorithms import get_default_algorithms
+
+from src.config import config
+
+ASYMMETRIC_ALGORITHMS = ("EdDSA", "RS256")
+LEGACY_KID = None
+
+
+class KeyRing:
+    # Keys live in JWT_KEYS_DIR as {kid}.pem. Private keys can sign, and
+    # every key (private or public-only) is published for verification,
+    # so rotation is: add the new key, deploy, switch JWT_KID, and drop the
+    # old file once its tokens have expired.
+    def __init__(
+        self,
+        algorithm: str = config.JWT_ALGORITHM,
+        keys_dir: str = config.JWT_KEYS_DIR,
+        kid: str | None = config.JWT_KID,
+        secret: str | None = config.JWT_SECRET,
+        accept_hs256: bool = config.JWT_ACCEPT_HS256,
+    ) -> None:
+        self.algorithm = algorithm
+        self.keys_dir = Path(keys_dir)
+        self.kid = kid
+        self.secret = secret
+        self.accept_hs256 = accept_hs256
+        self._signing: tuple[str | None, Any] | None = None
+        self._verifying: dict[str | None, tuple[Any, str]] = {}
+        self._jwks = b'{"keys":[]}'
+
+    def load(self) -> None:
+        verifying: dict[str | None, tuple[Any, str]] = {}
+        if self.algorithm not in ASYMMETRIC_ALGORITHMS:
+            self._signing = (LEGACY_KID, self.secret)
+            self._verifying = {LEGACY_KID: (self.secret, "HS256")}
+            return
+
+        if self.secret and self.accept_hs256:
+            # Tokens issued before the switch carry no kid.
+            verifying[LEGACY_KID] = (self.secret, "HS256")
+
+        private_keys = {}
+        jwks = []
+        jwk_algorithm = get_default_algorithms()[self.algorithm]
+        for path in sorted(self.keys_dir.glob("*.pem")):
+            kid = path.stem
+            public_key, private_key = _load_pem(path.read_bytes())
+            if private_key is not None:
+                private_keys[kid] = private_key
+            verifying[kid] = (public_key, self.algorithm)
+            jwk = jwk_algorithm.to_jwk(public_key, as_dict=True)
+            jwks.append(
+                {**jwk, "kid": kid, "use": "sig", "alg": self.algorithm}
+            )
+
+        kid = self.kid or (max(private_keys) if private_keys else None)
+        if kid not in private_keys:
+            raise RuntimeError(
+                f"No private {self.algorithm} key {kid!r} in {self.keys_dir}"
+            )
+        self._signing = (kid, private_keys[kid])
+        self._verifying = verifying
+        self._jwks = json.dumps({"keys": jwks}).encode()
+
+    @property
+    def signing_key(self) -> tuple[str | None, Any]:
+        if self._signing is None:
+            self.load()
+        assert self._signing is not None
+        return self._signing
+
+    def verification_key(self, kid: str | None) -> tuple[Any, str]:
+        if self._signing is None:
+            self.load()
+        try:
+            return self._verifying[kid]
+        except KeyError:
+            raise jwt.InvalidTokenError("Unknown signing key") from None
+
+    @property
+    def jwks(self) -> bytes:
+        if self._signing is None:
+            self.load()
+        return self._jwks
+
+
+def _load_pem(data: bytes) -> tuple[Any, Any]:
+    if b"PRIVATE KEY" in data:
+        private_key = serialization.load_pem_private_key(data, password=None)
+        return private_key.public_key(), private_key
+    return serialization.load_pem_public_key(data), None
+
+
+def generate_key(algorithm: str) -> bytes:
+    if algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        private_key = rsa.generate_private_key(
+            public_exponent=65537, key_size=2048
+        )
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+key_ring = KeyRing()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.auth.keys",
+        description="Generate a JWT signing key as {kid}.pem",
+    )
+    parser.add_argument("kid")
+    parser.add_argument(
+        "--algorithm", choices=ASYMMETRIC_ALGORITHMS, default="EdDSA"
+    )
+    parser.add_argument("--keys-dir", type=Path, default=config.JWT_KEYS_DIR)
+    args = parser.parse_args()
+
+    args.keys_dir.mkdir(parents=True, exist_ok=True)
+    path = args.keys_dir / f"{args.kid}.pem"
+    if path.exists():
+        parser.error(f"{path} already exists")
+    path.write_bytes(generate_key(args.algorithm))
+    path.chmod(0o600)
+    print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import hashlib
+
+from fastapi import HTTPException, Request, status
+from redis.exceptions import RedisError
+
+from src.auth.transport import RedisTransport
+from src.config import config
+from src.logging_config import logger
+
+# identity -> (limit, window in seconds)
+RateLimitPolicy = dict[str, tuple[int, int]]
+
+
+def parse_policy(value: str | None) -> RateLimitPolicy:
+    # "ip:30/60,email:10/60" -> {"ip": (30, 60), "email": (10, 60)}
+    policy: RateLimitPolicy = {}
+    for rule in filter(None, (value or "").split(",")):
+        identity, _, rate = rule.strip().partition(":")
+        limit, _, window = rate.partition("/")
+        policy[identity] = (int(limit), int(window))
+    return policy
+
+
+class RateLimiter:
+    def __init__(
+        self, transport: RedisTransport, policies: dict[str, RateLimitPolicy]
+    ) -> None:
+        self.transport = transport
+        self.policies = policies
+
+    @staticmethod
+    def identities(request: Request, email: str | None) -> dict[str, str]:
+        ip = request.client.host if request.client else "unknown"
+        agent = request.headers.get("user-agent", "")
+        identities = {"ip": ip, "agent": f"{ip}|{agent}"}
+        if email:
+            identities["email"] = email.lower()
+        return identities
+
+    async def check(
+        self, route: str, request: Request, email: str | None = None
+    ) -> None:
+        policy = self.policies.get(route)
+        if not policy:
+            return
+        limits = {}
+        for identity, value in self.identities(request, email).items():
+            if identity in policy:
+                digest = hashlib.blake2b(
+                    value.encode("utf-8"), digest_size=12
+                ).hexdigest()
+                # The {route} hash tag keeps one check's keys in one slot.
+                key = f"rl:{{{route}}}:{identity}:{digest}"
+                limits[key] = policy[identity]
+        if not limits:
+            return
+        try:
+            retry_after = await self.transport.hit(limits)
+        except RedisError:
+            logger.warning("Rate limiter unavailable", route=route)
+            return
+        if retry_after:
+            logger.warning("Rate limit exceeded", route=route)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(retry_after)},
+            )
+
+
+rate_limiter = RateLimiter(
+    RedisTransport(),
+    {
+        "access_token": parse_policy(config.RATE_LIMIT_ACCESS_TOKEN),
+        "forgot_password": parse_policy(config.RATE_LIMIT_FORGOT_PASSWORD),
+    },
+)
@@ -0,0 +1,199 @@
+import asyncio
+import contextlib
+import hashlib
+import time
+
+from redis.exceptions import RedisError
+
+from src.auth.schema.token import JWTTokenPayload
+from src.auth.transport import RedisTransport, get_redis
+from src.auth.util import fingerprint_agent, token_agent_fingerprint
+from src.config import config
+from src.logging_config import logger
+
+
+def session_fingerprint(token: JWTTokenPayload) -> str:
+    if token.sf is not None:
+        return token.sf
+    # Legacy tokens: every access token gets its own ks ciphertext, so this
+    # identifies the refresh token it was issued with, without decrypting.
+    return hashlib.blake2b(token.ks.encode(), digest_size=12).hexdigest()
+
+
+class RevocationState:
+    def __init__(
+        self,
+        retention: int = config.token_life_time,
+        max_staleness: float = config.REVOCATION_MAX_STALENESS,
+    ) -> None:
+        # Access tokens outlive a revocation by at most their lifetime, so
+        # entries older than that can be dropped.
+        self.retention = retention
+        self.max_staleness = max_staleness
+        # Revoked refresh-token fingerprints, and cutoffs before which all
+        # tokens of a user ("{sub}") or of one agent ("{sub}:{agent}") are
+        # revoked.
+        self.sessions: dict[str, float] = {}
+        self.cutoffs: dict[str, float] = {}
+        self.synced_at = float("-inf")
+        self.pruned_at = time.monotonic()
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() - self.synced_at < self.max_staleness
+
+    def touch(self) -> None:
+        self.synced_at = time.monotonic()
+
+    def apply(self, member: str, revoked_at: float) -> None:
+        kind, _, key = member.partition(":")
+        target = self.sessions if kind == "s" else self.cutoffs
+        if revoked_at > target.get(key, 0.0):
+            target[key] = revoked_at
+
+    def replace(self, entries: list[tuple[str, float]]) -> None:
+        self.sessions = {}
+        self.cutoffs = {}
+        for member, revoked_at in entries:
+            self.apply(member, revoked_at)
+        self.touch()
+
+    def prune(self) -> None:
+        cutoff = time.time() - self.retention
+        self.sessions = {k: v for k, v in self.sessions.items() if v > cutoff}
+        self.cutoffs = {k: v for k, v in self.cutoffs.items() if v > cutoff}
+        self.pruned_at = time.monotonic()
+
+    def check(self, token: JWTTokenPayload) -> bool | None:
+        # None means the local state can't decide and Redis has to.
+        if not self.is_fresh():
+            return None
+        if session_fingerprint(token) in self.sessions:
+            return False
+        if not self.cutoffs:
+            return True
+        valid: bool | None = True
+        agent_key = f"{token.sub}:{token_agent_fingerprint(token)}"
+        for key in (token.sub, agent_key):
+            cutoff = self.cutoffs.get(key)
+            if cutoff is None or token.iat > cutoff:
+                continue
+            # iat has one second resolution; a token minted in the same
+            # second as the cutoff may be on either side of it.
+            if token.iat < int(cutoff):
+                return False
+            valid = None
+        return valid
+
+
+class Revocations:
+    def __init__(
+        self,
+        transport: RedisTransport,
+        state: RevocationState,
+        channel: str = config.REVOCATION_CHANNEL,
+    ) -> None:
+        self.transport = transport
+        self.state = state
+        self.channel = channel
+        self._task: asyncio.Task | None = None
+
+    def check(self, token: JWTTokenPayload) -> bool | None:
+        return self.state.check(token)
+
+    async def revoke_session(self, token: JWTTokenPayload) -> None:
+        await self._publish(f"s:{session_fingerprint(token)}")
+
+    async def revoke_user(self, user_id: str) -> None:
+        await self._publish(f"u:{user_id}", time.time())
+
+    async def revoke_agent(
+        self, user_id: str, agent: str, revoked_at: float
+    ) -> None:
+        await self._publish(
+            f"a:{user_id}:{fingerprint_agent(agent)}", revoked_at
+        )
+
+    async def _publish(
+        self, member: str, revoked_at: float | None = None
+    ) -> None:
+        if revoked_at is None:
+            revoked_at = time.time()
+        # Publish first: if it fails the caller fails too, instead of only
+        # this worker knowing about the revocation.
+        await self.transport.publish_revocation(
+            member, revoked_at, self.state.retention
+        )
+        self.state.apply(member, revoked_at)
+
+    async def _listen(self) -> None:
+        pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(self.channel)
+            # Subscribe first so nothing published during the resync is lost.
+            since = time.time() - self.state.retention
+            self.state.replace(await self.transport.revocations(since))
+            logger.info(
+                "Revocations synced",
+                sessions=len(self.state.sessions),
+                cutoffs=len(self.state.cutoffs),
+            )
+            interval = self.state.max_staleness / 3
+            pinged_at = time.monotonic()
+            while True:
+                if time.monotonic() - pinged_at >= interval:
+                    await pubsub.ping()
+                    pinged_at = time.monotonic()
+                message = await pubsub.get_message(timeout=interval)
+                if message is None:
+                    continue
+                # Anything from the server, pongs included, proves the
+                # subscription is still live.
+                self.state.touch()
+                if message["type"] == "message":
+                    self._apply_message(message["data"])
+                elif time.monotonic() - self.state.pruned_at > 60:
+                    self.state.prune()
+        finally:
+            await pubsub.aclose()
+
+    def _apply_message(self, data: str) -> None:
+        member, _, revoked_at = data.rpartition(" ")
+        try:
+            if not member:
+                raise ValueError("missing member")
+            self.state.apply(member, float(revoked_at))
+        except ValueError:
+            logger.warning("Malformed revocation message", data=data)
+
+    async def run(self) -> None:
+        backoff = 0.1
+        while True:
+            started_at = time.monotonic()
+            try:
+                await self._listen()
+            except (RedisError, OSError) as exc:
+                logger.warning(
+                    "Revocation listener disconnected", error=str(exc)
+                )
+            except Exception:
+                # Anything else would end the task silently and leave every
+                # check on the Redis fallback.
+                logger.exception("Revocation listener failed")
+            if time.monotonic() - started_at > 30:
+                backoff = 0.1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 5.0)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+
+revocations = Revocations(RedisTransport(), RevocationState())
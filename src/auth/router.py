@@ -1,29 +1,65 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Body, Request, status
+from fastapi import (
+    APIRouter,
+    Body,
+    HTTPException,
+    Request,
+    Response,
+    status,
+)
 from pydantic import EmailStr
 
-from src.auth.schema.response import AccessTokenResponse
+from src.auth.keys import key_ring
+from src.auth.ratelimit import rate_limiter
+from src.auth.schema.request import IntrospectRequest
+from src.auth.schema.response import (
+    AccessTokenResponse,
+    IntrospectResponse,
+    SessionsResponse,
+)
+from src.config import config
 from src.dependencies import (
     CurrentUserDep,
+    IntrospectKeyDep,
     OAuth2FormDep,
+    ReadSessionDep,
     SessionDep,
+    TokenDep,
     UserManagerDep,
 )
-from src.schema import HTTPResponse, UserCreate, UserRead
+from src.response import PydanticResponse
+from src.schema import HTTPResponse, UserCreate
+
+auth_router = APIRouter(
+    prefix="/auth", tags=["auth"], default_response_class=PydanticResponse
+)
+jwks_router = APIRouter(tags=["auth"])
+
 
-auth_router = APIRouter(prefix="/auth", tags=["auth"])
+@jwks_router.get("/.well-known/jwks.json")
+async def jwks() -> Response:
+    # Rendered once per key load; downstream verifiers cache it too.
+    return Response(
+        key_ring.jwks,
+        media_type="application/json",
+        headers={"Cache-Control": f"public, max-age={config.JWKS_MAX_AGE}"},
+    )
 
 
-@auth_router.post("/register", status_code=status.HTTP_201_CREATED)
+@auth_router.post(
+    "/register",
+    response_model=HTTPResponse,
+    status_code=status.HTTP_201_CREATED,
+)
 async def register(
     user: UserCreate,
     request: Request,
     user_manager: UserManagerDep,
     session: SessionDep,
-) -> HTTPResponse:
+) -> PydanticResponse:
     result = await user_manager.create_user(user, request, session)
-    return result
+    return PydanticResponse(result, status.HTTP_201_CREATED)
 
 
 @auth_router.post(
@@ -36,58 +72,183 @@ async def token(
     user_manager: UserManagerDep,
     session: SessionDep,
     form_data: OAuth2FormDep,
-) -> AccessTokenResponse:
-    return await user_manager.accses_token(form_data, session, request)
+) -> PydanticResponse:
+    await rate_limiter.check("access_token", request, form_data.username)
+    return PydanticResponse(
+        await user_manager.accses_token(form_data, session, request)
+    )
 
 
-@auth_router.post("/logout", status_code=status.HTTP_200_OK)
+@auth_router.post(
+    "/refresh",
+    response_model=AccessTokenResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def refresh(
+    request: Request,
+    user_manager: UserManagerDep,
+    token: TokenDep,
+) -> PydanticResponse:
+    return PydanticResponse(await user_manager.refresh(token, request))
+
+
+@auth_router.post(
+    "/introspect",
+    response_model=IntrospectResponse,
+    status_code=status.HTTP_200_OK,
+    dependencies=[IntrospectKeyDep],
+)
+async def introspect(
+    body: IntrospectRequest,
+    user_manager: UserManagerDep,
+    session: SessionDep,
+    read_session: ReadSessionDep,
+) -> PydanticResponse:
+    # For gateways: results come back in request order, one per token.
+    return PydanticResponse(
+        await user_manager.introspect(body.tokens, session, read_session)
+    )
+
+
+@auth_router.post(
+    "/logout", response_model=HTTPResponse, status_code=status.HTTP_200_OK
+)
 async def logout(
     request: Request,
     session: SessionDep,
     user_manager: UserManagerDep,
     user: CurrentUserDep,
-) -> HTTPResponse:
+) -> PydanticResponse:
+    user_model, token = user
+
+    res = await user_manager.logout(user_model, token, request)
+    return PydanticResponse(res)
+
+
+@auth_router.post(
+    "/logout-all",
+    response_model=HTTPResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def logout_all(
+    request: Request,
+    user_manager: UserManagerDep,
+    user: CurrentUserDep,
+) -> PydanticResponse:
     user_model, token = user
+    await user_manager.check_refresh_token(token, request)
+    return PydanticResponse(await user_manager.logout_all(user_model, request))
 
-    res = await user_manager.logout(user_model, request)
-    return res
+
+@auth_router.get(
+    "/sessions",
+    response_model=SessionsResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def sessions(
+    request: Request,
+    user_manager: UserManagerDep,
+    user: CurrentUserDep,
+) -> PydanticResponse:
+    user_model, token = user
+    await user_manager.check_refresh_token(token, request)
+    return PydanticResponse(await user_manager.sessions(user_model, request))
 
 
 @auth_router.post(
-    "/request-forgot-password", status_code=status.HTTP_202_ACCEPTED
+    "/request-forgot-password",
+    response_model=HTTPResponse,
+    status_code=status.HTTP_202_ACCEPTED,
 )
 async def forgot_password(
     user_manager: UserManagerDep,
     email: Annotated[EmailStr, Body()],
     session: SessionDep,
+    read_session: ReadSessionDep,
     request: Request,
-) -> HTTPResponse:
-    user_model = await user_manager.db.get_by_email(email, session)
+) -> PydanticResponse:
+    await rate_limiter.check("forgot_password", request, email)
+    user_model = await user_manager.db.get_by_email(email, read_session)
     if user_model is None:
-        return HTTPResponse(status="success")
+        return PydanticResponse(
+            HTTPResponse(status="success"), status.HTTP_202_ACCEPTED
+        )
     res = await user_manager.forgot_password_token(
-        UserRead.model_validate(user_model, from_attributes=True), request
+        user_model, request, session
     )
 
-    return res
+    return PydanticResponse(res, status.HTTP_202_ACCEPTED)
 
 
-@auth_router.post("/verification", status_code=status.HTTP_202_ACCEPTED)
+@auth_router.post(
+    "/verification",
+    response_model=HTTPResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 async def verification(
-    user_manager: UserManagerDep, user: CurrentUserDep, request: Request
-) -> HTTPResponse:
+    user_manager: UserManagerDep,
+    user: CurrentUserDep,
+    request: Request,
+    session: SessionDep,
+) -> PydanticResponse:
     user_model, token = user
-    await user_manager.check_refresh_token(token)
-    res = await user_manager.verification_token(user_model, request)
-    return res
+    await user_manager.check_refresh_token(token, request)
+    res = await user_manager.verification_token(user_model, request, session)
+    return PydanticResponse(res, status.HTTP_202_ACCEPTED)
 
 
-@auth_router.get("/protected")
+@auth_router.post(
+    "/reset-password",
+    response_model=HTTPResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def reset_password(
+    user_manager: UserManagerDep,
+    email: Annotated[EmailStr, Body()],
+    code: Annotated[str, Body()],
+    password: Annotated[str, Body()],
+    session: SessionDep,
+    request: Request,
+) -> PydanticResponse:
+    await rate_limiter.check("forgot_password", request, email)
+    user_model = await user_manager.db.get_by_email(email, session)
+    if user_model is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid or expired code",
+        )
+    res = await user_manager.reset_password(
+        user_model, code, password, request, session
+    )
+    return PydanticResponse(res)
+
+
+@auth_router.post(
+    "/verify-email",
+    response_model=HTTPResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def verify_email(
+    user_manager: UserManagerDep,
+    user: CurrentUserDep,
+    code: Annotated[str, Body(embed=True)],
+    request: Request,
+) -> PydanticResponse:
+    user_model, token = user
+    await user_manager.check_refresh_token(token, request)
+    res = await user_manager.verify_email(user_model, code, request)
+    return PydanticResponse(res)
+
+
+@auth_router.get("/protected", response_model=HTTPResponse)
 async def protected(
+    request: Request,
     user_manager: UserManagerDep,
     user: CurrentUserDep,
-) -> HTTPResponse:
+) -> PydanticResponse:
     user_model, token = user
-    await user_manager.check_refresh_token(token)
+    await user_manager.check_refresh_token(token, request)
 
-    return HTTPResponse(status="success", detail=[user_model])
+    return PydanticResponse(
+        HTTPResponse(status="success", detail=[user_model])
+    )
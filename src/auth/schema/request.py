@@ -1,5 +1,18 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from src.config import config
 
 
 class RefreshTokenRequest(BaseModel):
     refresh_token: str
+
+
+class IntrospectItem(BaseModel):
+    token: str
+    agent: str
+
+
+class IntrospectRequest(BaseModel):
+    tokens: list[IntrospectItem] = Field(
+        min_length=1, max_length=config.INTROSPECT_MAX_BATCH
+    )
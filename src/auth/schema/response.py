@@ -1,4 +1,6 @@
-from src.schema import BaseResponse
+from pydantic import BaseModel
+
+from src.schema import BaseResponse, UserRead
 
 
 class AccessTokenResponse(BaseResponse):
@@ -6,3 +8,24 @@ class AccessTokenResponse(BaseResponse):
     access_token: str
     expires_at: int
     refresh_token_expires_at: int
+
+
+class SessionRead(BaseModel):
+    session: str
+    expires_at: int
+    current: bool
+
+
+class SessionsResponse(BaseResponse):
+    detail: list[SessionRead]
+
+
+class IntrospectResult(BaseModel):
+    active: bool
+    sub: str | None = None
+    exp: int | None = None
+    user: UserRead | None = None
+
+
+class IntrospectResponse(BaseResponse):
+    detail: list[IntrospectResult]
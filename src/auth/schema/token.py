@@ -6,8 +6,13 @@ class JWTTokenPayload(BaseModel):
     sub: str
     exp: int
     iat: int
-    ag: str
-    ks: str
+    # Compact tokens: fingerprints of the refresh token (sf, keyed) and
+    # agent (af, unkeyed).
+    sf: str | None = None
+    af: str | None = None
+    # Legacy tokens: encrypted refresh token and raw agent.
+    ag: str | None = None
+    ks: str | None = None
 
 
 class JWTToken(BaseModel):
@@ -1,31 +1,35 @@
+import hmac
 import secrets
 from uuid import UUID
 
-import cryptography
 import jwt
 from fastapi import HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.auth.schema.response import AccessTokenResponse
+from src.auth.hasher import check_password, hash_password
+from src.auth.revocation import revocations
+from src.auth.schema.request import IntrospectItem
+from src.auth.schema.response import (
+    AccessTokenResponse,
+    IntrospectResponse,
+    IntrospectResult,
+    SessionRead,
+    SessionsResponse,
+)
 from src.auth.schema.token import JWTTokenPayload
-from src.auth.transport import RedisTransport
+from src.auth.transport import RedisTransport, agent_fingerprint
 from src.auth.util import (
     create_jwt_token,
     decrypt_token,
-    encrypt_token,
-    get_password_hash,
+    fingerprint_refresh_token,
     verify_jwt_token,
-    verify_password,
 )
+from src.cache import user_cache
 from src.config import config
-from src.email_celery.constant import html_forgot_password_msg, html_verify_msg
-from src.email_celery.router import (
-    send_forgot_password_email_task,
-    send_verification_email_task,
-)
-from src.email_celery.util import generate_email
+from src.email_celery.backend import email_backend
 from src.logging_config import logger
+from src.metrics import revocation_checks
 from src.repository import AbstractRepository
 from src.schema import HTTPResponse, UserCreate, UserRead
 
@@ -39,36 +43,131 @@ class UserManager:
     ) -> None:
         self.db = db
         self.transpot = redis_transport
+        self.email = email_backend
 
     async def check_refresh_token(
-        self, token: JWTTokenPayload
+        self, token: JWTTokenPayload, request: Request
     ) -> HTTPResponse:
-        refresh_token_cryt = token.ks
-        refresh_token = await self.transpot.get(token.sub, token.ag)
-        refresh_token_decrypt = decrypt_token(refresh_token_cryt)
-        if refresh_token != refresh_token_decrypt:
-            logger.exception("Refresh token mismatch")
+        valid = revocations.check(token)
+        revocation_checks.inc("local" if valid is not None else "redis")
+        if valid is None:
+            valid = await self._session_matches(
+                token, request.headers["user-agent"]
+            )
+        if not valid:
+            logger.warning("Refresh token mismatch")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid refresh token",
             )
-        logger.info("Refresh token verified")
+        logger.debug("Refresh token verified")
         return HTTPResponse(status="success")
 
+    @staticmethod
+    def _is_current(token: JWTTokenPayload, current: str | None) -> bool:
+        from cryptography.fernet import InvalidToken
+
+        if current is None:
+            return False
+        # Compact tokens only carry a fingerprint of their refresh token.
+        if token.sf is not None:
+            return hmac.compare_digest(
+                fingerprint_refresh_token(current), token.sf
+            )
+        try:
+            return hmac.compare_digest(current, decrypt_token(token.ks))
+        except InvalidToken:
+            return False
+
+    async def _session_matches(
+        self, token: JWTTokenPayload, agent: str
+    ) -> bool:
+        current = await self.transpot.get(token.sub, agent)
+        return self._is_current(token, current)
+
+    async def introspect(
+        self,
+        items: list[IntrospectItem],
+        session: AsyncSession,
+        read_session: AsyncSession,
+    ) -> IntrospectResponse:
+        payloads: list[JWTTokenPayload | None] = []
+        for item in items:
+            try:
+                payloads.append(verify_jwt_token(item.token, item.agent))
+            except HTTPException:
+                payloads.append(None)
+
+        active = [payload is not None for payload in payloads]
+        pending = []
+        for i, payload in enumerate(payloads):
+            if payload is None:
+                continue
+            valid = revocations.check(payload)
+            revocation_checks.inc("local" if valid is not None else "redis")
+            if valid is None:
+                pending.append(i)
+            else:
+                active[i] = valid
+        # Whatever the local revocation state can't vouch for is read from
+        # Redis in one pipelined round trip.
+        currents = await self.transpot.get_many(
+            [(payloads[i].sub, items[i].agent) for i in pending]
+        )
+        for i, current in zip(pending, currents, strict=True):
+            active[i] = self._is_current(payloads[i], current)
+
+        user_ids = list(
+            dict.fromkeys(
+                UUID(payloads[i].sub) for i, ok in enumerate(active) if ok
+            )
+        )
+        users = await user_cache.get_many(user_ids)
+        missing = [user_id for user_id in user_ids if user_id not in users]
+        if missing:
+            found = await self.db.get_many(missing, read_session)
+            if len(found) < len(missing) and read_session is not session:
+                # A replica may not have replayed a just-created account yet.
+                seen = {user.id for user in found}
+                found += await self.db.get_many(
+                    [user_id for user_id in missing if user_id not in seen],
+                    session,
+                )
+            await user_cache.set_many(found)
+            users.update((user.id, user) for user in found)
+
+        results = []
+        for payload, ok in zip(payloads, active, strict=True):
+            user = users.get(UUID(payload.sub)) if ok else None
+            if user is None:
+                results.append(IntrospectResult(active=False))
+                continue
+            results.append(
+                IntrospectResult(
+                    active=True, sub=payload.sub, exp=payload.exp, user=user
+                )
+            )
+        logger.debug(
+            "Tokens introspected",
+            tokens=len(items),
+            redis=len(pending),
+            db=len(missing),
+        )
+        return IntrospectResponse(detail=results)
+
     async def create_user(
         self, user: UserCreate, request: Request, session: AsyncSession
     ) -> HTTPResponse:
         user_check = await self.db.get_by_email(user.email, session)
-        print(user_check)
         if user_check is not None:
-            logger.exception("Email already registered", email=user.email)
-            
+            logger.warning("Email already registered", email=user.email)
+
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Email {user.email=} already registered",
             )
 
-        user.password = get_password_hash(user.password)
+        user.password = await hash_password(user.password)
         user_read = await self.db.add(user, session)
         await session.commit()
         self.after_register(request, user=user_read)
@@ -81,32 +180,45 @@ class UserManager:
         session: AsyncSession,
         request: Request,
     ) -> AccessTokenResponse:
-        user = await self.db.get_by_email(form_data.username, session)
-        if user is None or not verify_password(
+        user = await self.db.get_credentials(form_data.username, session)
+        if user is None or not await check_password(
             form_data.password, user.password
         ):
-            logger.exception(
+            logger.warning(
                 "Incorrect email or password", email=form_data.username
             )
-            
+
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Incorrect email or password",
             )
 
         refresh_token = secrets.token_urlsafe(64)
-        key = encrypt_token(refresh_token)
-        token = create_jwt_token(user.id, request.headers["user-agent"], key)
+        token = create_jwt_token(
+            user.id, request.headers["user-agent"], refresh_token
+        )
         expire_second = config.refresh_token_life_time
 
-        await self.transpot.set(
+        replaced = await self.transpot.set(
             user_id=str(user.id),
             agent=request.headers["user-agent"],
             token=refresh_token,
             expire_time=expire_second,
         )
+        if replaced:
+            # Logging in again on the same agent drops its old session, and
+            # tokens minted in earlier seconds go with it. The cutoff sits
+            # just below the new token's iat so it stays valid locally.
+            await revocations.revoke_agent(
+                str(user.id),
+                request.headers["user-agent"],
+                token.payload.iat - 0.5,
+            )
         self.after_login(
-            request, UserRead.model_validate(user, from_attributes=True)
+            request,
+            UserRead.model_construct(
+                id=user.id, email=user.email, first_name=user.first_name
+            ),
         )
 
         logger.info("User logged in", user_id=user.id, user_email=user.email)
@@ -120,6 +232,8 @@ class UserManager:
     async def refresh(
         self, token: str, request: Request
     ) -> AccessTokenResponse:
+        from cryptography.fernet import InvalidToken
+
         try:
             payload = verify_jwt_token(token, request.headers["user-agent"])
             if payload is None:
@@ -134,32 +248,28 @@ class UserManager:
                     detail="Could not validate credentials",
                 )
 
-            refresh_token = await self.transpot.get(id, payload.ag)
-
-            if refresh_token is None or refresh_token != decrypt_token(
-                payload.ks
-            ):
+            agent = request.headers["user-agent"]
+            current = await self.transpot.get(id, agent)
+            refresh_token = secrets.token_urlsafe(64)
+            rotated = self._is_current(
+                payload, current
+            ) and await self.transpot.rotate(id, agent, current, refresh_token)
+            if not rotated:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Could not validate credentials",
                 )
+            await revocations.revoke_session(payload)
 
-            refresh_token = secrets.token_urlsafe(64)
-
-            crypt_key = encrypt_token(refresh_token)
-
-            await self.transpot.set(
-                id, refresh_token, request.headers["user-agent"]
-            )
-            access_token = create_jwt_token(UUID(id), payload.ag, crypt_key)
+            access_token = create_jwt_token(UUID(id), agent, refresh_token)
 
         except jwt.InvalidTokenError as e:
-            logger.exception("Invalid token")
+            logger.warning("Invalid token", error=str(e))
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
             ) from e
-        except cryptography.fernet.InvalidToken as e:
+        except InvalidToken as e:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token",
@@ -176,14 +286,47 @@ class UserManager:
             refresh_token_expires_at=config.refresh_token_life_time,
         )
 
-    async def logout(self, user: UserRead, request: Request) -> HTTPResponse:
-        await self.transpot.delete(str(user.id))
+    async def logout(
+        self, user: UserRead, token: JWTTokenPayload, request: Request
+    ) -> HTTPResponse:
+        await self.transpot.revoke(str(user.id), request.headers["user-agent"])
+        await revocations.revoke_session(token)
         self.after_logout(request, user)
         logger.info("User logged out", user_id=user.id, user_email=user.email)
         return HTTPResponse(status="success")
 
-    async def forgot_password_token(
+    async def logout_all(
+        self, user: UserRead, request: Request
+    ) -> HTTPResponse:
+        await self.transpot.revoke_all(str(user.id))
+        await revocations.revoke_user(str(user.id))
+        self.after_logout(request, user)
+        logger.info(
+            "User logged out everywhere",
+            user_id=user.id,
+            user_email=user.email,
+        )
+        return HTTPResponse(status="success")
+
+    async def sessions(
         self, user: UserRead, request: Request
+    ) -> SessionsResponse:
+        current = agent_fingerprint(request.headers["user-agent"])
+        sessions = await self.transpot.sessions(str(user.id))
+        return SessionsResponse(
+            status="success",
+            detail=[
+                SessionRead(
+                    session=fingerprint,
+                    expires_at=expire_at,
+                    current=fingerprint == current,
+                )
+                for fingerprint, expire_at in sessions.items()
+            ],
+        )
+
+    async def forgot_password_token(
+        self, user: UserRead, request: Request, session: AsyncSession
     ) -> HTTPResponse:
         numbers = [secrets.choice(range(10)) for _ in range(6)]
         secrets_code = "".join(map(str, numbers))
@@ -199,11 +342,12 @@ class UserManager:
             user_id=user.id,
             user_email=user.email,
         )
-        self.after_forgot_password(request, user, secrets_code)
+        self.after_forgot_password(request, user, secrets_code, session)
+        await session.commit()
         return HTTPResponse(status="success")
 
     async def verification_token(
-        self, user: UserRead, request: Request
+        self, user: UserRead, request: Request, session: AsyncSession
     ) -> HTTPResponse:
         numbers = [secrets.choice(range(10)) for _ in range(6)]
         secrets_code = "".join(map(str, numbers))
@@ -217,7 +361,45 @@ class UserManager:
         logger.info(
             "User request verification", user_id=user.id, user_email=user.email
         )
-        self.after_request_verification(request, user, secrets_code)
+        self.after_request_verification(request, user, secrets_code, session)
+        await session.commit()
+        return HTTPResponse(status="success")
+
+    async def _consume_code(
+        self, user: UserRead, request: Request, code: str, iss: str
+    ) -> None:
+        if not await self.transpot.consume_code(
+            str(user.id), request.headers["user-agent"], code, iss
+        ):
+            logger.warning("Invalid code", user_id=user.id, iss=iss)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid or expired code",
+            )
+
+    async def reset_password(
+        self,
+        user: UserRead,
+        code: str,
+        password: str,
+        request: Request,
+        session: AsyncSession,
+    ) -> HTTPResponse:
+        await self._consume_code(user, request, code, "forgot")
+        await self.db.set_password(
+            user.id, await hash_password(password), session
+        )
+        await session.commit()
+        logger.info("User reset password", user_id=user.id)
+        await self.after_change_password(request, user)
+        return HTTPResponse(status="success")
+
+    async def verify_email(
+        self, user: UserRead, code: str, request: Request
+    ) -> HTTPResponse:
+        await self._consume_code(user, request, code, "verify")
+        logger.info("User verified email", user_id=user.id)
+        await self.after_verify_email(request, user)
         return HTTPResponse(status="success")
 
     def after_login(self, request: Request, user: UserRead) -> None:
@@ -233,45 +415,51 @@ class UserManager:
         print(f"Uset with id {user.id} registered")
 
     def after_forgot_password(
-        self, request: Request, user: UserRead, token: str
+        self,
+        request: Request,
+        user: UserRead,
+        token: str,
+        session: AsyncSession | None = None,
     ) -> None:
         print(f"Uset with id {user.id} forgot password")
         print(token)
-        msg = generate_email(
-            user_email=user.email,
-            token=token,
-            html_msg=html_forgot_password_msg,
-            subject_msg="Forgot Password",
-        )
         logger.info(
-            "Send task in Celery",
-            task="send_forgot_password_email_task",
+            "Send email",
+            backend=self.email.name,
+            template="reset_password",
             user_email=user.email,
         )
-        send_forgot_password_email_task.delay(user.email, msg.as_string())
+        self.email.send(
+            user.email, "reset_password", {"token": token}, session
+        )
 
-    def after_change_password(self, request: Request, user: UserRead) -> None:
+    async def after_change_password(
+        self, request: Request, user: UserRead
+    ) -> None:
+        await user_cache.invalidate(user.id)
         print("after change password")
         print(f"Uset with id {user.id} change password")
 
     def after_request_verification(
-        self, request: Request, user: UserRead, token: str
+        self,
+        request: Request,
+        user: UserRead,
+        token: str,
+        session: AsyncSession | None = None,
     ) -> None:
         print(f"Uset with id {user.id} request verification")
         print(token)
-        msg = generate_email(
-            user_email=user.email,
-            token=token,
-            html_msg=html_verify_msg,
-            subject_msg="Verification",
-        )
         logger.info(
-            "Send task in Celery",
-            task="send_verification_email_task",
+            "Send email",
+            backend=self.email.name,
+            template="confirm_email",
             user_email=user.email,
         )
-        send_verification_email_task.delay(user.email, msg.as_string())
+        self.email.send(user.email, "confirm_email", {"token": token}, session)
 
-    def after_verify_email(self, request: Request, user: UserRead) -> None:
+    async def after_verify_email(
+        self, request: Request, user: UserRead
+    ) -> None:
+        await user_cache.invalidate(user.id)
         print("after verify email")
         print(f"Uset with id {user.id} verify email")
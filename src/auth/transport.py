@@ -1,18 +1,209 @@
-import secrets
+import hashlib
+import hmac
+import time
 
 from redis.asyncio.client import Redis
+from redis.commands.core import AsyncScript
 
 from src.config import config
+from src.metrics import redis_command_duration, timed_async
+
+# Sessions of a user live in one hash, "sessions:{user_id}", with a
+# field per agent fingerprint holding "{expire_at}:{refresh_token}".
+# The key itself expires together with the longest living session.
+_SESSION_LIB = """
+local function now()
+    return tonumber(redis.call('TIME')[1])
+end
+
+local function read(key, field, ts)
+    local value = redis.call('HGET', key, field)
+    if not value then
+        return nil
+    end
+    local sep = string.find(value, ':', 1, true)
+    if tonumber(string.sub(value, 1, sep - 1)) <= ts then
+        redis.call('HDEL', key, field)
+        return nil
+    end
+    return string.sub(value, sep + 1)
+end
+
+local function write(key, field, token, ttl, ts)
+    redis.call('HSET', key, field, (ts + ttl) .. ':' .. token)
+    if redis.call('TTL', key) < ttl then
+        redis.call('EXPIRE', key, ttl)
+    end
+end
+"""
+
+_SET_SCRIPT = (
+    _SESSION_LIB
+    + """
+local ts = now()
+local replaced = read(KEYS[1], ARGV[1], ts) and 1 or 0
+write(KEYS[1], ARGV[1], ARGV[2], tonumber(ARGV[3]), ts)
+return replaced
+"""
+)
+
+_GET_SCRIPT = (
+    _SESSION_LIB
+    + """
+return read(KEYS[1], ARGV[1], now())
+"""
+)
+
+_ROTATE_SCRIPT = (
+    _SESSION_LIB
+    + """
+local ts = now()
+if read(KEYS[1], ARGV[1], ts) ~= ARGV[2] then
+    return 0
+end
+write(KEYS[1], ARGV[1], ARGV[3], tonumber(ARGV[4]), ts)
+return 1
+"""
+)
+
+_VERIFY_SCRIPT = (
+    _SESSION_LIB
+    + """
+local ts = now()
+if read(KEYS[1], ARGV[1], ts) ~= ARGV[2] then
+    return 0
+end
+if tonumber(ARGV[3]) > 0 then
+    write(KEYS[1], ARGV[1], ARGV[2], tonumber(ARGV[3]), ts)
+end
+return 1
+"""
+)
+
+_REVOKE_SCRIPT = (
+    _SESSION_LIB
+    + """
+if ARGV[2] ~= '' and read(KEYS[1], ARGV[1], now()) ~= ARGV[2] then
+    return 0
+end
+return redis.call('HDEL', KEYS[1], ARGV[1])
+"""
+)
+
+# Revocations are kept in a sorted set scored by revocation time, so a
+# subscriber that missed messages can resync, and fanned out over pub/sub.
+# ARGV: member, timestamp, retention, channel, message
+_REVOCATION_SCRIPT = """
+local ts = tonumber(ARGV[2])
+redis.call('ZADD', KEYS[1], ts, ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ts - tonumber(ARGV[3]))
+return redis.call('PUBLISH', ARGV[4], ARGV[5])
+"""
+
+# Sliding window counter: the previous fixed window is weighted by how
+# much of it still overlaps the sliding window. KEYS holds the current and
+# previous bucket of each limit, ARGV the time and a (limit, window) pair
+# per limit. Nothing is counted unless every limit has room; the result is
+# the seconds to wait, or 0.
+_HIT_SCRIPT = """
+local now = tonumber(ARGV[1])
+local retry_after = 0
+for i = 1, #KEYS, 2 do
+    local limit = tonumber(ARGV[i + 1])
+    local window = tonumber(ARGV[i + 2])
+    local overlap = 1 - (now % window) / window
+    local current = tonumber(redis.call('GET', KEYS[i]))
+    local previous = tonumber(redis.call('GET', KEYS[i + 1]))
+    if (previous or 0) * overlap + (current or 0) >= limit then
+        retry_after = math.max(retry_after, window - now % window)
+    end
+end
+if retry_after > 0 then
+    return math.ceil(retry_after)
+end
+for i = 1, #KEYS, 2 do
+    redis.call('INCR', KEYS[i])
+    redis.call('EXPIRE', KEYS[i], tonumber(ARGV[i + 2]) * 2)
+end
+return 0
+"""
+
+
+def agent_fingerprint(agent: str) -> str:
+    return hashlib.blake2b(agent.encode("utf-8"), digest_size=8).hexdigest()
+
+
+_redis: Redis | None = None
+_scripts: dict[str, AsyncScript] = {}
+
+
+def get_redis() -> Redis:
+    global _redis
+    if _redis is None:
+        _redis = Redis.from_url(config.REDIS_URL, decode_responses=True)
+    return _redis
+
+
+def set_redis(client: Redis | None) -> None:
+    global _redis
+    _redis = client
+
+
+async def close_redis() -> None:
+    if _redis is not None:
+        await _redis.aclose()
+    set_redis(None)
 
 
 class RedisTransport:
-    redis = Redis.from_url(config.REDIS_URL, decode_responses=True)
+    @property
+    def redis(self) -> Redis:
+        return get_redis()
+
+    async def _run(
+        self, script: str, keys: list[str], args: list, client=None
+    ):
+        # Scripts go through EVALSHA and are loaded on the first miss (or,
+        # on a pipeline, before it executes).
+        registered = _scripts.get(script)
+        if registered is None:
+            registered = _scripts[script] = self.redis.register_script(script)
+        return await registered(keys, args, client=client or self.redis)
+
+    @staticmethod
+    def _sessions_key(user_id: str) -> str:
+        return f"sessions:{user_id}"
+
+    @staticmethod
+    def _code_key(user_id: str, agent: str, iss: str) -> str:
+        return f"{iss}:{user_id}:{agent_fingerprint(agent)}"
 
+    @timed_async(redis_command_duration, "get")
     async def get(self, user_id: str, agent: str) -> str | None:
-        async with self.redis.client() as conn:
-            result = await conn.get(f"{agent}_{user_id}")
-            return result
+        return await self._run(
+            _GET_SCRIPT,
+            [self._sessions_key(user_id)],
+            [agent_fingerprint(agent)],
+        )
 
+    @timed_async(redis_command_duration, "get_many")
+    async def get_many(
+        self, sessions: list[tuple[str, str]]
+    ) -> list[str | None]:
+        # (user_id, agent) pairs, read in a single round trip.
+        if not sessions:
+            return []
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for user_id, agent in sessions:
+                await self._run(
+                    _GET_SCRIPT,
+                    [self._sessions_key(user_id)],
+                    [agent_fingerprint(agent)],
+                    client=pipe,
+                )
+            return await pipe.execute()
+
+    @timed_async(redis_command_duration, "set")
     async def set(
         self,
         user_id: str,
@@ -20,26 +211,115 @@ class RedisTransport:
         token: str,
         expire_time: int = config.refresh_token_life_time,
         iss: str | None = None,
-    ):
-        async with self.redis.client() as conn:
-            name = f"{iss}_{agent}_{user_id}" if iss else f"{agent}_{user_id}"
-            await conn.set(name, token, expire_time)
+    ) -> bool:
+        if iss:
+            await self.redis.set(
+                self._code_key(user_id, agent, iss), token, expire_time
+            )
+            return False
+        replaced = await self._run(
+            _SET_SCRIPT,
+            [self._sessions_key(user_id)],
+            [agent_fingerprint(agent), token, expire_time],
+        )
+        return bool(replaced)
 
-    async def delete(self, user_id: str) -> None:
-        async with self.redis.client() as conn:
-            await conn.delete(user_id)
+    @timed_async(redis_command_duration, "consume_code")
+    async def consume_code(
+        self, user_id: str, agent: str, token: str, iss: str
+    ) -> bool:
+        # A code is good for one attempt; a wrong guess burns it too.
+        stored = await self.redis.getdel(self._code_key(user_id, agent, iss))
+        return stored is not None and hmac.compare_digest(stored, token)
 
-    async def refresh(
+    @timed_async(redis_command_duration, "rotate")
+    async def rotate(
         self,
         user_id: str,
+        agent: str,
+        token: str,
+        new_token: str,
         expire_time: int = config.refresh_token_life_time,
-    ) -> str | None:
-        async with self.redis.client() as conn:
-            token = await conn.get(user_id)
+    ) -> bool:
+        result = await self._run(
+            _ROTATE_SCRIPT,
+            [self._sessions_key(user_id)],
+            [agent_fingerprint(agent), token, new_token, expire_time],
+        )
+        return bool(result)
+
+    @timed_async(redis_command_duration, "verify")
+    async def verify(
+        self,
+        user_id: str,
+        agent: str,
+        token: str,
+        touch: int | None = None,
+    ) -> bool:
+        result = await self._run(
+            _VERIFY_SCRIPT,
+            [self._sessions_key(user_id)],
+            [agent_fingerprint(agent), token, touch or 0],
+        )
+        return bool(result)
+
+    @timed_async(redis_command_duration, "revoke")
+    async def revoke(
+        self, user_id: str, agent: str, token: str | None = None
+    ) -> bool:
+        result = await self._run(
+            _REVOKE_SCRIPT,
+            [self._sessions_key(user_id)],
+            [agent_fingerprint(agent), token or ""],
+        )
+        return bool(result)
+
+    @timed_async(redis_command_duration, "revoke_all")
+    async def revoke_all(self, user_id: str) -> bool:
+        return bool(await self.redis.delete(self._sessions_key(user_id)))
+
+    @timed_async(redis_command_duration, "hit")
+    async def hit(self, limits: dict[str, tuple[int, int]]) -> int:
+        # Bucket keys are derived here so the script only touches keys it
+        # is given, as Redis Cluster requires.
+        now = time.time()
+        keys = []
+        args: list = [f"{now:.6f}"]
+        for key, (limit, window) in limits.items():
+            index = int(now // window)
+            keys.extend((f"{key}:{index}", f"{key}:{index - 1}"))
+            args.extend((limit, window))
+        return await self._run(_HIT_SCRIPT, keys, args)
+
+    @timed_async(redis_command_duration, "publish_revocation")
+    async def publish_revocation(
+        self, member: str, revoked_at: float, retention: int
+    ) -> None:
+        await self._run(
+            _REVOCATION_SCRIPT,
+            [config.REVOCATION_KEY],
+            [
+                member,
+                revoked_at,
+                retention,
+                config.REVOCATION_CHANNEL,
+                f"{member} {revoked_at:.6f}",
+            ],
+        )
 
-            if token is None:
-                return token
+    @timed_async(redis_command_duration, "revocations")
+    async def revocations(self, since: float) -> list[tuple[str, float]]:
+        return await self.redis.zrangebyscore(
+            config.REVOCATION_KEY, since, "+inf", withscores=True
+        )
 
-            token = secrets.token_urlsafe(64)
-            await conn.set(user_id, token, expire_time)
-            return token
+    @timed_async(redis_command_duration, "sessions")
+    async def sessions(self, user_id: str) -> dict[str, int]:
+        raw = await self.redis.hgetall(self._sessions_key(user_id))
+        now = int(time.time())
+        sessions = {}
+        for fingerprint, value in raw.items():
+            expire_at = int(value.partition(":")[0])
+            if expire_at > now:
+                sessions[fingerprint] = expire_at
+        return sessions
@@ -1,63 +1,147 @@
+import hashlib
+import hmac
 import time
+from functools import cache
+from typing import TYPE_CHECKING, Any
 from uuid import UUID
 
 import bcrypt
 import jwt
-from cryptography.fernet import Fernet
 from fastapi import HTTPException
 
+from src.auth import fingerprint
+from src.auth.keys import key_ring
 from src.auth.schema.token import JWTToken, JWTTokenPayload
+from src.cache import TTLCache
 from src.config import config
+from src.metrics import timed, token_crypto_duration
 
-_f = Fernet(config.CRYPT_KEY)
+if TYPE_CHECKING:
+    from cryptography.fernet import Fernet
 
+_token_cache = TTLCache(config.TOKEN_CACHE_SIZE, config.TOKEN_CACHE_TTL)
 
+_CLAIMS = (
+    ("iss", str),
+    ("sub", str),
+    ("exp", int),
+    ("iat", int),
+)
+_COMPACT_CLAIMS = (("sf", str), ("af", str))
+# Issued before TOKEN_FORMAT=compact; accepted while TOKEN_ACCEPT_LEGACY is on.
+_LEGACY_CLAIMS = (("ag", str), ("ks", str))
+
+
+@cache
+def _fingerprint_key() -> bytes:
+    if not config.TOKEN_FINGERPRINT_KEY:
+        raise RuntimeError("TOKEN_FINGERPRINT_KEY is not set")
+    return fingerprint.derive_key(config.TOKEN_FINGERPRINT_KEY)
+
+
+def fingerprint_refresh_token(refresh_token: str) -> str:
+    return fingerprint.session_fingerprint(_fingerprint_key(), refresh_token)
+
+
+def fingerprint_agent(agent: str) -> str:
+    return fingerprint.agent_fingerprint(agent)
+
+
+def token_agent_fingerprint(payload: JWTTokenPayload) -> str:
+    if payload.af is not None:
+        return payload.af
+    return fingerprint_agent(payload.ag)
+
+
+@timed(token_crypto_duration, "jwt_encode")
 def create_jwt_token(
     user_id: UUID,
     agent: str,
-    key: str,
+    refresh_token: str,
     expire_second: int = config.token_life_time,
     iss: str = "authserver",
 ) -> JWTToken:
     iss = iss
     iat = int(time.time())
     exp = iat + expire_second
-    payload = JWTTokenPayload(
-        iss=iss, sub=str(user_id), exp=exp, iat=iat, ag=agent, ks=key
-    )
+    if config.TOKEN_FORMAT == "legacy":
+        payload = JWTTokenPayload(
+            iss=iss,
+            sub=str(user_id),
+            exp=exp,
+            iat=iat,
+            ag=agent,
+            ks=encrypt_token(refresh_token),
+        )
+    else:
+        payload = JWTTokenPayload(
+            iss=iss,
+            sub=str(user_id),
+            exp=exp,
+            iat=iat,
+            sf=fingerprint_refresh_token(refresh_token),
+            af=fingerprint_agent(agent),
+        )
 
+    kid, signing_key = key_ring.signing_key
     access_token = jwt.encode(
-        payload.model_dump(), config.JWT_SECRET, algorithm="HS256"
+        payload.model_dump(exclude_none=True),
+        signing_key,
+        algorithm=key_ring.algorithm,
+        headers=None if kid is None else {"kid": kid},
     )
 
     return JWTToken(payload=payload, access_token=access_token)
 
 
+def decode_claims(raw_payload: dict[str, Any]) -> JWTTokenPayload:
+    if "sf" in raw_payload:
+        schema = _CLAIMS + _COMPACT_CLAIMS
+    elif config.TOKEN_ACCEPT_LEGACY:
+        schema = _CLAIMS + _LEGACY_CLAIMS
+    else:
+        raise jwt.InvalidTokenError("Invalid token")
+    claims = {}
+    for name, claim_type in schema:
+        value = raw_payload.get(name)
+        if not isinstance(value, claim_type):
+            raise jwt.InvalidTokenError("Invalid token")
+        claims[name] = value
+    return JWTTokenPayload.model_construct(**claims)
+
+
+def agent_matches(payload: JWTTokenPayload, agent: str) -> bool:
+    if payload.af is not None:
+        return hmac.compare_digest(payload.af, fingerprint_agent(agent))
+    return payload.ag == agent
+
+
+@timed(token_crypto_duration, "jwt_decode")
+def _decode_jwt(token: str) -> dict[str, Any]:
+    kid = jwt.get_unverified_header(token).get("kid")
+    key, algorithm = key_ring.verification_key(kid)
+    return jwt.decode(
+        token,
+        key,
+        algorithms=[algorithm],
+        options={"verify_signature": True},
+    )
+
+
 def verify_jwt_token(
     token: str, agent: str, iss: str = "authserver"
 ) -> JWTTokenPayload:
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
     try:
-        raw_payload = jwt.decode(
-            token,
-            config.JWT_SECRET,
-            algorithms=["HS256"],
-            options={"verify_signature": True},
-            issuer=iss,
-        )
-        username: str = raw_payload.get("sub")
-        if (
-            username is None
-            or raw_payload.get("ks") is None
-            or raw_payload.get("ag") is None
-            or raw_payload.get("iat") is None
-            or raw_payload.get("exp") is None
-        ):
-            raise jwt.InvalidTokenError("Invalid token")
+        payload = _token_cache.get(digest)
+        if payload is None:
+            payload = decode_claims(_decode_jwt(token))
+            _token_cache.set(digest, payload, expire_at=payload.exp)
+
+        if payload.iss != iss:
+            raise jwt.InvalidIssuerError("Invalid issuer")
 
-        if (
-            raw_payload.get("exp") < int(time.time())
-            or raw_payload.get("ag") != agent
-        ):
+        if payload.exp < int(time.time()) or not agent_matches(payload, agent):
             raise jwt.InvalidTokenError("Token expired or invalid agent")
 
     except jwt.InvalidTokenError as exc:
@@ -65,7 +149,7 @@ def verify_jwt_token(
             status_code=401, detail=f"Invalid token:\n\t {exc}"
         ) from exc
 
-    return JWTTokenPayload(**raw_payload)
+    return payload
 
 
 def get_password_hash(password: str) -> str:
@@ -81,9 +165,18 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     )
 
 
+@cache
+def _fernet() -> "Fernet":
+    from cryptography.fernet import Fernet
+
+    return Fernet(config.CRYPT_KEY)
+
+
+@timed(token_crypto_duration, "fernet_encrypt")
 def encrypt_token(token: str) -> str:
-    return _f.encrypt(token.encode("utf-8")).decode("utf-8")
+    return _fernet().encrypt(token.encode("utf-8")).decode("utf-8")
 
 
+@timed(token_crypto_duration, "fernet_decrypt")
 def decrypt_token(token: str) -> str:
-    return _f.decrypt(token.encode("utf-8")).decode("utf-8")
+    return _fernet().decrypt(token.encode("utf-8")).decode("utf-8")
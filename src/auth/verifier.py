@@ -0,0 +1,68 @@
+# Offline verification of access tokens for downstream services. Only
+# needs PyJWT[crypto] and src.auth.fingerprint (which is dependency free),
+# so the two can be vendored or installed alongside another app.
+#
+#     verifier = TokenVerifier("https://auth.example/.well-known/jwks.json")
+#     claims = verifier.verify(token, agent=request.headers["user-agent"])
+#
+# Keys are fetched once and cached; an unknown kid (after a rotation)
+# triggers a single refetch, rate limited by PyJWKClient's cooldown.
+#
+# Compact tokens bind the agent with an unkeyed fingerprint (af), so the
+# check needs no secret either.
+import asyncio
+import hmac
+from typing import Any
+
+import jwt
+
+from src.auth.fingerprint import agent_fingerprint
+
+ALGORITHMS = ("EdDSA", "RS256")
+
+
+class TokenVerifier:
+    def __init__(
+        self,
+        jwks_url: str,
+        issuer: str = "authserver",
+        algorithms: tuple[str, ...] = ALGORITHMS,
+        cache_ttl: float = 300,
+        leeway: float = 0,
+        timeout: float = 5,
+    ) -> None:
+        self.issuer = issuer
+        self.algorithms = list(algorithms)
+        self.leeway = leeway
+        self.jwks = jwt.PyJWKClient(
+            jwks_url,
+            cache_keys=True,
+            cache_jwk_set=True,
+            lifespan=cache_ttl,
+            timeout=timeout,
+        )
+
+    def verify(self, token: str, agent: str | None = None) -> dict[str, Any]:
+        signing_key = self.jwks.get_signing_key_from_jwt(token)
+        claims = jwt.decode(
+            token,
+            signing_key.key,
+            algorithms=self.algorithms,
+            issuer=self.issuer,
+            leeway=self.leeway,
+            options={"require": ["exp", "iat", "iss", "sub"]},
+        )
+        if agent is not None and not self._agent_matches(claims, agent):
+            raise jwt.InvalidTokenError("Token was issued to another agent")
+        return claims
+
+    @staticmethod
+    def _agent_matches(claims: dict[str, Any], agent: str) -> bool:
+        if "af" not in claims:
+            return claims.get("ag") == agent
+        return hmac.compare_digest(str(claims["af"]), agent_fingerprint(agent))
+
+    async def prefetch(self) -> None:
+        # Warm the cache at startup so the first request doesn't block the
+        # event loop on the JWKS fetch.
+        await asyncio.to_thread(self.jwks.get_jwk_set)
@@ -0,0 +1,147 @@
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+from uuid import UUID
+
+from redis.exceptions import RedisError
+
+from src.auth.transport import RedisTransport
+from src.config import config
+from src.logging_config import logger
+from src.schema import UserRead
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expire_at, value = item
+        if expire_at <= time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(
+        self, key: Hashable, value: Any, expire_at: float | None = None
+    ) -> None:
+        if self.maxsize <= 0:
+            return
+        ttl_expire_at = time.time() + self.ttl
+        if expire_at is None or expire_at > ttl_expire_at:
+            expire_at = ttl_expire_at
+        self._data[key] = (expire_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class UserCache:
+    def __init__(
+        self,
+        transport: RedisTransport,
+        maxsize: int = config.USER_CACHE_SIZE,
+        local_ttl: int = config.USER_CACHE_TTL,
+        redis_ttl: int = config.USER_CACHE_REDIS_TTL,
+    ) -> None:
+        self.transport = transport
+        self.local = TTLCache(maxsize, local_ttl)
+        self.redis_ttl = redis_ttl
+
+    @staticmethod
+    def _key(user_id: UUID) -> str:
+        return f"user:{user_id}"
+
+    async def get(self, user_id: UUID) -> UserRead | None:
+        user = self.local.get(user_id)
+        if user is not None:
+            return user
+        try:
+            raw = await self.transport.redis.get(self._key(user_id))
+        except RedisError:
+            logger.warning("User cache unavailable", user_id=user_id)
+            return None
+        if raw is None:
+            return None
+        user = UserRead.model_validate_json(raw)
+        self.local.set(user_id, user)
+        return user
+
+    async def get_many(self, user_ids: list[UUID]) -> dict[UUID, UserRead]:
+        users = {}
+        missing = []
+        for user_id in user_ids:
+            user = self.local.get(user_id)
+            if user is None:
+                missing.append(user_id)
+            else:
+                users[user_id] = user
+        if not missing:
+            return users
+        try:
+            raws = await self.transport.redis.mget(
+                [self._key(user_id) for user_id in missing]
+            )
+        except RedisError:
+            logger.warning("User cache unavailable", users=len(missing))
+            return users
+        for user_id, raw in zip(missing, raws, strict=True):
+            if raw is not None:
+                user = UserRead.model_validate_json(raw)
+                self.local.set(user_id, user)
+                users[user_id] = user
+        return users
+
+    async def set_many(self, users: list[UserRead]) -> None:
+        if not users:
+            return
+        for user in users:
+            self.local.set(user.id, user)
+        try:
+            async with self.transport.redis.pipeline(
+                transaction=False
+            ) as pipe:
+                for user in users:
+                    pipe.set(
+                        self._key(user.id),
+                        user.model_dump_json(),
+                        self.redis_ttl,
+                    )
+                await pipe.execute()
+        except RedisError:
+            logger.warning("User cache unavailable", users=len(users))
+
+    async def set(self, user: UserRead) -> None:
+        self.local.set(user.id, user)
+        try:
+            await self.transport.redis.set(
+                self._key(user.id), user.model_dump_json(), self.redis_ttl
+            )
+        except RedisError:
+            logger.warning("User cache unavailable", user_id=user.id)
+
+    async def invalidate(self, user_id: UUID) -> None:
+        self.local.delete(user_id)
+        try:
+            await self.transport.redis.delete(self._key(user_id))
+        except RedisError:
+            logger.warning("User cache unavailable", user_id=user_id)
+
+
+user_cache = UserCache(RedisTransport())
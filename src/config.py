@@ -15,7 +15,7 @@ path_env = [
 def load_env():
     for path in path_env:
         if Path.exists(Path(path)):
-            print(load_dotenv(Path(path)))
+            load_dotenv(Path(path))
 
 
 class Config:
@@ -26,6 +26,42 @@ class Config:
         self.POSTGRES_HOST = os.environ.get("POSTGRES_HOST")
         self.POSTGRES_PORT = os.environ.get("POSTGRES_PORT")
         self.POSTGRES_URL = f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+        # "direct" or "pgbouncer" (transaction pooling)
+        self.POSTGRES_POOL_MODE = os.environ.get(
+            "POSTGRES_POOL_MODE", "direct"
+        )
+        # Direct connections only; pgbouncer mode always disables the cache.
+        self.POSTGRES_STATEMENT_CACHE_SIZE = int(
+            os.environ.get("POSTGRES_STATEMENT_CACHE_SIZE", 100)
+        )
+        self.POSTGRES_POOL_SIZE = int(os.environ.get("POSTGRES_POOL_SIZE", 5))
+        self.POSTGRES_MAX_OVERFLOW = int(
+            os.environ.get("POSTGRES_MAX_OVERFLOW", 10)
+        )
+        self.POSTGRES_REPLICA_URLS = [
+            url
+            for url in os.environ.get("POSTGRES_REPLICA_URLS", "").split(",")
+            if url
+        ]
+        self.POSTGRES_REPLICA_POOL_SIZE = int(
+            os.environ.get("POSTGRES_REPLICA_POOL_SIZE", 5)
+        )
+        self.POSTGRES_REPLICA_MAX_OVERFLOW = int(
+            os.environ.get("POSTGRES_REPLICA_MAX_OVERFLOW", 10)
+        )
+        self.POSTGRES_REPLICA_MAX_LAG = float(
+            os.environ.get("POSTGRES_REPLICA_MAX_LAG", 2.0)
+        )
+        self.POSTGRES_REPLICA_CHECK_INTERVAL = float(
+            os.environ.get("POSTGRES_REPLICA_CHECK_INTERVAL", 5.0)
+        )
+        # An idle primary only sends WAL sender keepalives every
+        # wal_sender_timeout / 2 (30s by default), so keep this above that.
+        # The lag check reads pg_stat_wal_receiver, so the replica role
+        # needs pg_read_all_stats.
+        self.POSTGRES_REPLICA_STALL_TIMEOUT = float(
+            os.environ.get("POSTGRES_REPLICA_STALL_TIMEOUT", 45.0)
+        )
 
         self.REDIS_PASSWORD = os.environ.get("REDIS_PASSWORD")
         self.REDIS_USER = os.environ.get("REDIS_USER")
@@ -40,17 +76,128 @@ class Config:
         self.RABBITMQ_URL = f"amqp://{self.RABBITMQ_USER}:{self.RABBITMQ_PASSWORD}@{self.RABBITMQ_HOST}:{self.RABBITMQ_PORT}/"
 
         self.JWT_SECRET = os.environ.get("JWT_SECRET")
+        # HS256 (shared JWT_SECRET), EdDSA or RS256 (keys in JWT_KEYS_DIR)
+        self.JWT_ALGORITHM = os.environ.get("JWT_ALGORITHM", "HS256")
+        self.JWT_KEYS_DIR = os.environ.get("JWT_KEYS_DIR", "keys/jwt")
+        self.JWT_KID = os.environ.get("JWT_KID")
+        self.JWKS_MAX_AGE = int(os.environ.get("JWKS_MAX_AGE", 300))
+        # Keep verifying kid-less HS256 tokens signed with JWT_SECRET after
+        # switching JWT_ALGORITHM to EdDSA/RS256. Turn it off once TOKEN_LIFE
+        # has passed since the switch; until then the old secret can still
+        # mint accepted tokens.
+        self.JWT_ACCEPT_HS256 = os.environ.get(
+            "JWT_ACCEPT_HS256",
+            "true" if self.JWT_ALGORITHM == "HS256" else "false",
+        ).lower() in ("1", "true", "yes")
+        # "compact" tokens carry fingerprints of the refresh token (sf,
+        # keyed) and agent (af); "legacy" ones the encrypted token and raw
+        # agent.
+        self.TOKEN_FORMAT = os.environ.get("TOKEN_FORMAT", "compact")
+        self.TOKEN_ACCEPT_LEGACY = os.environ.get(
+            "TOKEN_ACCEPT_LEGACY", "true"
+        ).lower() in ("1", "true", "yes")
         self.CRYPT_KEY = os.environ.get("CRYPT_KEY")
+        # Keys the refresh token fingerprint (sf). Only this server needs
+        # it; keep it separate from CRYPT_KEY, which decrypts legacy ks.
+        self.TOKEN_FINGERPRINT_KEY = os.environ.get("TOKEN_FINGERPRINT_KEY")
+        self.ADMIN_API_KEY = os.environ.get("ADMIN_API_KEY")
+        # Sent by the scraper as "Authorization: Bearer <key>"; /metrics
+        # answers 403 while it is unset.
+        self.METRICS_API_KEY = os.environ.get("METRICS_API_KEY")
+        # Gateways calling /auth/introspect; the endpoint answers 403 while
+        # it is unset. Deliberately not the admin key.
+        self.INTROSPECT_API_KEY = os.environ.get("INTROSPECT_API_KEY")
+        self.INTROSPECT_MAX_BATCH = int(
+            os.environ.get("INTROSPECT_MAX_BATCH", 100)
+        )
 
         self.token_life_time = int(os.environ.get("TOKEN_LIFE"))
         self.refresh_token_life_time = int(
             os.environ.get("REFRESH_TOKEN_LIFE")
         )
+        self.TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", 10000))
+        self.TOKEN_CACHE_TTL = int(os.environ.get("TOKEN_CACHE_TTL", 60))
+
+        self.RATE_LIMIT_ACCESS_TOKEN = os.environ.get(
+            "RATE_LIMIT_ACCESS_TOKEN", "ip:60/60,agent:30/60,email:10/300"
+        )
+        self.RATE_LIMIT_FORGOT_PASSWORD = os.environ.get(
+            "RATE_LIMIT_FORGOT_PASSWORD", "ip:20/300,email:3/300"
+        )
+
+        self.REVOCATION_KEY = os.environ.get("REVOCATION_KEY", "revocations")
+        self.REVOCATION_CHANNEL = os.environ.get(
+            "REVOCATION_CHANNEL", "revocations"
+        )
+        self.REVOCATION_MAX_STALENESS = float(
+            os.environ.get("REVOCATION_MAX_STALENESS", 3.0)
+        )
+
+        self.USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 10000))
+        # Invalidation only reaches this process's local tier and Redis, so
+        # other workers can serve a stale user for up to USER_CACHE_TTL.
+        self.USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", 5))
+        self.USER_CACHE_REDIS_TTL = int(
+            os.environ.get("USER_CACHE_REDIS_TTL", 300)
+        )
 
         self.SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD")
         self.SMTP_HOST = os.environ.get("SMTP_HOST")
         self.SMTP_PORT = os.environ.get("SMTP_PORT")
         self.SMTP_USER = os.environ.get("SMTP_USER")
+        self.SMTP_POOL_SIZE = int(os.environ.get("SMTP_POOL_SIZE", 2))
+        self.SMTP_POOL_MAX_IDLE = int(os.environ.get("SMTP_POOL_MAX_IDLE", 30))
+
+        self.EMAIL_BACKEND = os.environ.get("EMAIL_BACKEND", "celery")
+        self.EMAIL_QUEUE_SIZE = int(os.environ.get("EMAIL_QUEUE_SIZE", 1000))
+        self.EMAIL_BATCH_SIZE = int(os.environ.get("EMAIL_BATCH_SIZE", 50))
+        self.EMAIL_MAX_RETRIES = int(os.environ.get("EMAIL_MAX_RETRIES", 5))
+        self.EMAIL_RETRY_BACKOFF = float(
+            os.environ.get("EMAIL_RETRY_BACKOFF", 1.0)
+        )
+        self.EMAIL_DRAIN_TIMEOUT = float(
+            os.environ.get("EMAIL_DRAIN_TIMEOUT", 10.0)
+        )
+        self.OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 500))
+        self.OUTBOX_POLL_INTERVAL = float(
+            os.environ.get("OUTBOX_POLL_INTERVAL", 1.0)
+        )
+
+        self.PASSWORD_HASH_EXECUTOR = os.environ.get(
+            "PASSWORD_HASH_EXECUTOR", "thread"
+        )
+        self.PASSWORD_HASH_WORKERS = int(
+            os.environ.get("PASSWORD_HASH_WORKERS", 4)
+        )
+        self.PASSWORD_HASH_MAX_PENDING = int(
+            os.environ.get("PASSWORD_HASH_MAX_PENDING", 64)
+        )
+
+        # Shared by the server's worker processes so /metrics covers all of
+        # them; src.server sets it up when running more than one.
+        self.METRICS_DIR = os.environ.get("METRICS_DIR")
+        self.METRICS_SYNC_INTERVAL = float(
+            os.environ.get("METRICS_SYNC_INTERVAL", 1.0)
+        )
+
+        # src.server; 0 workers means one per available CPU.
+        self.SERVER_HOST = os.environ.get("SERVER_HOST", "0.0.0.0")
+        self.SERVER_PORT = int(os.environ.get("SERVER_PORT", 8000))
+        self.SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", 0))
+        self.SERVER_LOOP = os.environ.get("SERVER_LOOP", "auto")
+        self.SERVER_HTTP = os.environ.get("SERVER_HTTP", "auto")
+        self.SERVER_BACKLOG = int(os.environ.get("SERVER_BACKLOG", 2048))
+        # Keep above the load balancer's idle timeout so it never reuses a
+        # connection the server is closing.
+        self.SERVER_KEEP_ALIVE = int(os.environ.get("SERVER_KEEP_ALIVE", 75))
+        self.SERVER_GRACEFUL_TIMEOUT = int(
+            os.environ.get("SERVER_GRACEFUL_TIMEOUT", 30)
+        )
+        self.SERVER_LIMIT_CONCURRENCY = (
+            int(os.environ["SERVER_LIMIT_CONCURRENCY"])
+            if os.environ.get("SERVER_LIMIT_CONCURRENCY")
+            else None
+        )
 
 
 load_env()
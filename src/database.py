@@ -1,20 +1,144 @@
+import asyncio
+import itertools
+import os
+import secrets
+import time
+
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.config import config
 from src.logging_config import logger
+from src.metrics import db_pool_checkout_duration, db_query_duration
+
+_engine: AsyncEngine | None = None
+_session_maker: async_sessionmaker[AsyncSession] | None = None
+_replicas: list["Replica"] | None = None
+_replica_counter = itertools.count()
+_replica_monitor: asyncio.Task | None = None
+
+_REPLICA_LAG_QUERY = text(
+    """
+SELECT
+    r.status,
+    EXTRACT(EPOCH FROM now() - r.last_msg_receipt_time),
+    pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn(),
+    EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+FROM (SELECT 1) AS probe
+LEFT JOIN pg_stat_wal_receiver AS r ON true
+"""
+)
+
+
+def _replica_lag(
+    status: str | None,
+    since_message: float | None,
+    replayed: bool | None,
+    replay_age: float | None,
+    stall_timeout: float,
+) -> float | None:
+    # A replica whose WAL receiver is down or hasn't heard from the primary
+    # within the stall timeout may be arbitrarily far behind, so it reports
+    # the time since its last message (None without a receiver).
+    if (
+        status != "streaming"
+        or since_message is None
+        or since_message > stall_timeout
+    ):
+        return None if since_message is None else float(since_message)
+    # Replayed everything it received, so an idle primary isn't lag.
+    if replayed:
+        return 0.0
+    return None if replay_age is None else float(replay_age)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_duration.observe(
+                time.perf_counter() - started_at, self.logging_name
+            )
+
+
+def _before_cursor_execute(conn, cursor, statement, params, context, many):
+    # On the per-statement context, so a failed statement (which never
+    # reaches after_cursor_execute) leaves nothing behind.
+    if context is not None:
+        context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, params, context, many):
+    started_at = getattr(context, "_query_started_at", None)
+    if started_at is not None:
+        db_query_duration.observe(
+            time.perf_counter() - started_at, conn.engine.logging_name
+        )
+
+
+_statement_prefix: tuple[int, str] | None = None
+_statement_counter = itertools.count()
+
+
+def statement_name() -> str:
+    # PgBouncer hands server connections to any client between
+    # transactions, so names must not collide across hosts and processes.
+    # A random nonce, not hostname:pid, since a restarted container
+    # usually gets the same pids while PgBouncer's server connections
+    # still hold the previous process's statements.
+    global _statement_prefix
+    pid = os.getpid()
+    if _statement_prefix is None or _statement_prefix[0] != pid:
+        _statement_prefix = (pid, f"__asyncpg_{secrets.token_hex(6)}")
+    return f"{_statement_prefix[1]}_{next(_statement_counter)}__"
+
+
+def statement_cache_size(pool_mode: str = config.POSTGRES_POOL_MODE) -> int:
+    # Cached statements outlive the transaction, and with it the server
+    # connection PgBouncer lent us.
+    if pool_mode == "pgbouncer":
+        return 0
+    return config.POSTGRES_STATEMENT_CACHE_SIZE
 
-def new_async_engine() -> AsyncEngine:
+
+def connect_args(pool_mode: str = config.POSTGRES_POOL_MODE) -> dict:
+    # statement_cache_size is asyncpg's own cache;
+    # prepared_statement_cache_size is the SQLAlchemy dialect's.
+    cache_size = statement_cache_size(pool_mode)
+    args = {
+        "statement_cache_size": cache_size,
+        "prepared_statement_cache_size": cache_size,
+    }
+    if pool_mode == "pgbouncer":
+        args["prepared_statement_name_func"] = statement_name
+    return args
+
+
+def new_async_engine(
+    name: str = "primary",
+    url: str = config.POSTGRES_URL,
+    pool_size: int = config.POSTGRES_POOL_SIZE,
+    max_overflow: int = config.POSTGRES_MAX_OVERFLOW,
+    pool_mode: str = config.POSTGRES_POOL_MODE,
+) -> AsyncEngine:
     try:
         engine = create_async_engine(
-            config.POSTGRES_URL,
+            url,
+            connect_args=connect_args(pool_mode),
+            poolclass=TimedQueuePool,
+            logging_name=name,
+            pool_logging_name=name,
             pool_pre_ping=True,
-            pool_size=5,
-            max_overflow=10,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
             pool_timeout=30.0,
             pool_recycle=600,
         )
@@ -22,12 +146,122 @@ def new_async_engine() -> AsyncEngine:
         logger.exception("Database connection failed")
         logger.exception(exc_info=True)
         raise e
+    event.listen(
+        engine.sync_engine, "before_cursor_execute", _before_cursor_execute
+    )
+    event.listen(
+        engine.sync_engine, "after_cursor_execute", _after_cursor_execute
+    )
     return engine
 
 
-_engine = new_async_engine()
-_session_maker = async_sessionmaker(_engine, expire_on_commit=False)
+def get_engine() -> AsyncEngine:
+    global _engine, _session_maker
+    if _engine is None:
+        _engine = new_async_engine()
+        _session_maker = async_sessionmaker(_engine, expire_on_commit=False)
+    return _engine
 
 
 def get_session() -> AsyncSession:
+    if _session_maker is None:
+        get_engine()
+    assert _session_maker is not None
     return _session_maker()
+
+
+class Replica:
+    def __init__(
+        self,
+        name: str,
+        engine: AsyncEngine,
+        stall_timeout: float = config.POSTGRES_REPLICA_STALL_TIMEOUT,
+    ) -> None:
+        self.name = name
+        self.engine = engine
+        self.stall_timeout = stall_timeout
+        self.session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        # Unknown until the first lag check, so reads start on the primary.
+        self.healthy = False
+        self.lag: float | None = None
+
+    async def check(self, max_lag: float) -> bool:
+        try:
+            async with asyncio.timeout(max(max_lag, 1.0)):
+                async with self.engine.connect() as conn:
+                    row = (await conn.execute(_REPLICA_LAG_QUERY)).one()
+            self.lag = _replica_lag(*row, self.stall_timeout)
+        except Exception:
+            logger.debug("Replica lag check failed", replica=self.name)
+            self.lag = None
+        healthy = self.lag is not None and self.lag <= max_lag
+        if healthy != self.healthy:
+            logger.warning(
+                "Replica health changed",
+                replica=self.name,
+                healthy=healthy,
+                lag=self.lag,
+            )
+        self.healthy = healthy
+        return healthy
+
+
+def get_replicas() -> list[Replica]:
+    global _replicas
+    if _replicas is None:
+        _replicas = [
+            Replica(
+                f"replica{i}",
+                new_async_engine(
+                    f"replica{i}",
+                    url,
+                    config.POSTGRES_REPLICA_POOL_SIZE,
+                    config.POSTGRES_REPLICA_MAX_OVERFLOW,
+                ),
+            )
+            for i, url in enumerate(config.POSTGRES_REPLICA_URLS)
+        ]
+    return _replicas
+
+
+def get_read_session() -> AsyncSession | None:
+    healthy = [replica for replica in get_replicas() if replica.healthy]
+    if not healthy:
+        return None
+    return healthy[next(_replica_counter) % len(healthy)].session_maker()
+
+
+async def check_replicas(
+    max_lag: float = config.POSTGRES_REPLICA_MAX_LAG,
+) -> None:
+    await asyncio.gather(
+        *(replica.check(max_lag) for replica in get_replicas())
+    )
+
+
+async def _monitor_replicas(interval: float) -> None:
+    while True:
+        await check_replicas()
+        await asyncio.sleep(interval)
+
+
+def start_replica_monitor(
+    interval: float = config.POSTGRES_REPLICA_CHECK_INTERVAL,
+) -> None:
+    global _replica_monitor
+    if _replica_monitor is None and get_replicas():
+        _replica_monitor = asyncio.create_task(_monitor_replicas(interval))
+
+
+async def dispose_engine() -> None:
+    global _engine, _session_maker, _replicas, _replica_monitor
+    if _replica_monitor is not None:
+        _replica_monitor.cancel()
+        _replica_monitor = None
+    for replica in _replicas or ():
+        await replica.engine.dispose()
+    _replicas = None
+    if _engine is not None:
+        await _engine.dispose()
+    _engine = None
+    _session_maker = None
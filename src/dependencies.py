@@ -1,15 +1,24 @@
+import secrets
 from collections.abc import AsyncGenerator
 from typing import Annotated
 from uuid import UUID
 
 from fastapi import Depends, HTTPException, Request, status
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi.security import (
+    APIKeyHeader,
+    HTTPAuthorizationCredentials,
+    HTTPBearer,
+    OAuth2PasswordBearer,
+    OAuth2PasswordRequestForm,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.schema.token import JWTTokenPayload
 from src.auth.service import UserManager
 from src.auth.util import verify_jwt_token
-from src.database import get_session
+from src.cache import user_cache
+from src.config import config
+from src.database import get_read_session, get_session
 from src.repository import UserRepository
 from src.schema import UserRead
 
@@ -25,6 +34,22 @@ async def async_get_session() -> AsyncGenerator[AsyncSession, None]:
 SessionDep = Annotated[AsyncSession, Depends(async_get_session)]
 
 
+async def async_get_read_session(
+    session: SessionDep,
+) -> AsyncGenerator[AsyncSession, None]:
+    # Without a healthy replica, reads share the request's primary session
+    # rather than checking out a second connection.
+    read_session = get_read_session()
+    if read_session is None:
+        yield session
+        return
+    async with read_session:
+        yield read_session
+
+
+ReadSessionDep = Annotated[AsyncSession, Depends(async_get_read_session)]
+
+
 async def get_user_manager() -> AsyncGenerator[UserManager, None]:
     yield UserManager(db=UserRepository())
 
@@ -33,23 +58,75 @@ UserManagerDep = Annotated[UserManager, Depends(get_user_manager)]
 
 
 async def get_current_user(
-    request: Request, token: TokenDep, session: SessionDep
+    request: Request,
+    token: TokenDep,
+    session: SessionDep,
+    read_session: ReadSessionDep,
 ) -> tuple[UserRead, JWTTokenPayload]:
     token_payload = verify_jwt_token(
         token, agent=request.headers["user-agent"]
     )
 
-    user = await UserRepository.get(UUID(token_payload.sub), session)
+    user_id = UUID(token_payload.sub)
+    user = await user_cache.get(user_id)
+    if user is not None:
+        return (user, token_payload)
+
+    user = await UserRepository.get(user_id, read_session)
+    if user is None and read_session is not session:
+        # A replica may not have replayed a just-created account yet.
+        user = await UserRepository.get(user_id, session)
 
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="You are not authorized to access this resource",
         )
-    return (UserRead.model_validate(user, from_attributes=True), token_payload)
+    await user_cache.set(user)
+    return (user, token_payload)
 
 
 CurrentUserDep = Annotated[
     tuple[UserRead, JWTTokenPayload], Depends(get_current_user)
 ]
 OAuth2FormDep = Annotated[OAuth2PasswordRequestForm, Depends()]
+
+
+admin_key_scheme = APIKeyHeader(name="X-API-Key", auto_error=False)
+
+
+def _check_api_key(api_key: str | None, expected: str | None) -> None:
+    if not expected or not secrets.compare_digest(api_key or "", expected):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not authorized to access this resource",
+        )
+
+
+async def check_admin_key(
+    api_key: Annotated[str | None, Depends(admin_key_scheme)],
+) -> None:
+    _check_api_key(api_key, config.ADMIN_API_KEY)
+
+
+async def check_introspect_key(
+    api_key: Annotated[str | None, Depends(admin_key_scheme)],
+) -> None:
+    _check_api_key(api_key, config.INTROSPECT_API_KEY)
+
+
+metrics_key_scheme = HTTPBearer(auto_error=False)
+
+
+async def check_metrics_key(
+    credentials: Annotated[
+        HTTPAuthorizationCredentials | None, Depends(metrics_key_scheme)
+    ],
+) -> None:
+    api_key = credentials.credentials if credentials else None
+    _check_api_key(api_key, config.METRICS_API_KEY)
+
+
+AdminKeyDep = Depends(check_admin_key)
+MetricsKeyDep = Depends(check_metrics_key)
+IntrospectKeyDep = Depends(check_introspect_key)
@@ -0,0 +1,178 @@
+import asyncio
+from abc import ABC, abstractmethod
+from collections import deque
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import config
+from src.email_celery.smtp import SMTPPool
+from src.email_celery.util import generate_email
+from src.logging_config import logger
+from src.metrics import celery_published
+from src.model import EmailOutbox
+
+EmailMessage = tuple[str, str, dict[str, str]]
+
+
+class EmailBackend(ABC):
+    name: str
+
+    @abstractmethod
+    def send(
+        self,
+        user_email: str,
+        template_id: str,
+        variables: dict[str, str],
+        session: AsyncSession | None = None,
+    ) -> bool:
+        raise NotImplementedError
+
+    async def start(self) -> None:
+        return None
+
+    async def stop(self) -> None:
+        return None
+
+
+class CeleryEmailBackend(EmailBackend):
+    name = "celery"
+
+    def send(
+        self,
+        user_email: str,
+        template_id: str,
+        variables: dict[str, str],
+        session: AsyncSession | None = None,
+    ) -> bool:
+        from src.email_celery.router import send_email_task
+
+        send_email_task.delay(user_email, template_id, variables)
+        celery_published.inc(send_email_task.name)
+        return True
+
+
+class AsyncioEmailBackend(EmailBackend):
+    name = "inprocess"
+
+    def __init__(
+        self,
+        queue_size: int = config.EMAIL_QUEUE_SIZE,
+        batch_size: int = config.EMAIL_BATCH_SIZE,
+        max_retries: int = config.EMAIL_MAX_RETRIES,
+        retry_backoff: float = config.EMAIL_RETRY_BACKOFF,
+        drain_timeout: float = config.EMAIL_DRAIN_TIMEOUT,
+        smtp_pool: SMTPPool | None = None,
+    ) -> None:
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.drain_timeout = drain_timeout
+        self.smtp_pool = smtp_pool or SMTPPool(size=1)
+        self._queue: asyncio.Queue[EmailMessage] | None = None
+        self._worker: asyncio.Task | None = None
+
+    def send(
+        self,
+        user_email: str,
+        template_id: str,
+        variables: dict[str, str],
+        session: AsyncSession | None = None,
+    ) -> bool:
+        if self._queue is None:
+            logger.error("Email queue is not running", user_email=user_email)
+            return False
+        try:
+            self._queue.put_nowait((user_email, template_id, variables))
+        except asyncio.QueueFull:
+            logger.error("Email queue is full", user_email=user_email)
+            return False
+        return True
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(self.queue_size)
+        self._worker = asyncio.create_task(self._run(self._queue))
+
+    async def stop(self) -> None:
+        if self._queue is None or self._worker is None:
+            return
+        queue, self._queue = self._queue, None
+        try:
+            await asyncio.wait_for(queue.join(), self.drain_timeout)
+        except TimeoutError:
+            logger.error("Email queue not drained", left=queue.qsize())
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+        await asyncio.to_thread(self.smtp_pool.close)
+
+    async def _run(self, queue: asyncio.Queue[EmailMessage]) -> None:
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                await self._deliver(batch)
+            except Exception:
+                logger.exception("Email batch failed", size=len(batch))
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _deliver(self, batch: list[EmailMessage]) -> None:
+        pending = deque(
+            (
+                user_email,
+                generate_email(user_email, template_id, variables).as_string(),
+            )
+            for user_email, template_id, variables in batch
+        )
+        for attempt in range(self.max_retries + 1):
+            try:
+                await asyncio.to_thread(self.smtp_pool.send_many, pending)
+                return
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.retry_backoff * 2**attempt
+                logger.warning(
+                    "Email delivery failed, retrying",
+                    left=len(pending),
+                    delay=delay,
+                )
+                await asyncio.sleep(delay)
+
+
+class OutboxEmailBackend(EmailBackend):
+    name = "outbox"
+
+    def send(
+        self,
+        user_email: str,
+        template_id: str,
+        variables: dict[str, str],
+        session: AsyncSession | None = None,
+    ) -> bool:
+        # The row is committed together with the caller's transaction
+        # and published to Celery later by src.email_celery.relay.
+        if session is None:
+            raise ValueError("Outbox email backend requires a session")
+        session.add(
+            EmailOutbox(
+                recipient=user_email,
+                template=template_id,
+                variables=variables,
+            )
+        )
+        return True
+
+
+def get_email_backend() -> EmailBackend:
+    if AsyncioEmailBackend.name == config.EMAIL_BACKEND:
+        return AsyncioEmailBackend()
+    if OutboxEmailBackend.name == config.EMAIL_BACKEND:
+        return OutboxEmailBackend()
+    return CeleryEmailBackend()
+
+
+email_backend = get_email_backend()
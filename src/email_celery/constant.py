@@ -1,7 +1,14 @@
-html_verify_msg = ""
-with open("src/email_celery/template/confirm_email.html") as f:
-    html_verify_msg = f.read()
-
-html_forgot_password_msg = ""
-with open("src/email_celery/template/reset_password.html") as f:
-    html_forgot_password_msg = f.read()
+# template id -> (html file, subject, plain text body)
+EMAIL_TEMPLATES = {
+    "confirm_email": (
+        "confirm_email.html",
+        "Verify your email",
+        "Hello, please confirm your email\nThis your token: |token|",
+    ),
+    "reset_password": (
+        "reset_password.html",
+        "Reset your password",
+        "Hello, use this code to reset your password\n"
+        "This your token: |token|",
+    ),
+}
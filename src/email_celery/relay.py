@@ -0,0 +1,73 @@
+import asyncio
+
+from sqlalchemy import delete, select
+
+from src.config import config
+from src.database import get_session
+from src.logging_config import configure_logging, logger
+from src.metrics import celery_published
+from src.model import EmailOutbox
+
+EmailMessage = tuple[str, str, dict[str, str]]
+
+
+def publish(messages: list[EmailMessage]) -> None:
+    from src.email_celery.router import async_queue, send_email_batch_task
+
+    batch_size = config.EMAIL_BATCH_SIZE
+    with async_queue.producer_or_acquire() as producer:
+        for start in range(0, len(messages), batch_size):
+            send_email_batch_task.apply_async(
+                (messages[start : start + batch_size],), producer=producer
+            )
+            celery_published.inc(send_email_batch_task.name)
+
+
+async def relay_once(batch_size: int = config.OUTBOX_BATCH_SIZE) -> int:
+    async with get_session() as session, session.begin():
+        stmt = (
+            select(
+                EmailOutbox.id,
+                EmailOutbox.recipient,
+                EmailOutbox.template,
+                EmailOutbox.variables,
+            )
+            .order_by(EmailOutbox.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        rows = (await session.execute(stmt)).all()
+        if not rows:
+            return 0
+
+        messages = [
+            (row.recipient, row.template, row.variables) for row in rows
+        ]
+        await asyncio.to_thread(publish, messages)
+        await session.execute(
+            delete(EmailOutbox).where(
+                EmailOutbox.id.in_([row.id for row in rows])
+            )
+        )
+    logger.info("Outbox relayed", count=len(rows))
+    return len(rows)
+
+
+async def run_relay(
+    batch_size: int = config.OUTBOX_BATCH_SIZE,
+    poll_interval: float = config.OUTBOX_POLL_INTERVAL,
+) -> None:
+    await logger.ainfo("Outbox relay started", batch_size=batch_size)
+    while True:
+        try:
+            count = await relay_once(batch_size)
+        except Exception:
+            logger.exception("Outbox relay failed")
+            count = 0
+        if count < batch_size:
+            await asyncio.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(run_relay())
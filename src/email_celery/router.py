@@ -1,34 +1,46 @@
-import smtplib
+from collections import deque
 
 from celery import Celery  # type: ignore
+from celery.signals import worker_process_shutdown  # type: ignore
 
 from src.config import config
-from src.email_celery.constant import html_forgot_password_msg, html_verify_msg
+from src.email_celery.smtp import SMTPPool
 from src.email_celery.util import generate_email
+from src.logging_config import configure_logging
+
+configure_logging()
 
 async_queue = Celery(
     "router", broker=config.RABBITMQ_URL, backend=config.REDIS_URL
 )
 async_queue.config_from_object(config)
 
+smtp_pool = SMTPPool()
+
+
+@worker_process_shutdown.connect
+def close_smtp_pool(**kwargs) -> None:
+    smtp_pool.close()
+
 
 @async_queue.task
-def send_verification_email_task(user_email: str, token: str) -> bool:
-    email = generate_email(
-        user_email, token, html_verify_msg, "Verify your email"
-    )
-    with smtplib.SMTP_SSL(config.SMTP_HOST, config.SMTP_PORT) as server:
-        server.login(config.SMTP_USER, config.SMTP_PASSWORD)
-        server.sendmail(config.SMTP_USER, user_email, email.as_string())
+def send_email_task(
+    user_email: str, template_id: str, variables: dict[str, str]
+) -> bool:
+    email = generate_email(user_email, template_id, variables)
+    smtp_pool.send(user_email, email.as_string())
     return True
 
 
 @async_queue.task
-def send_forgot_password_email_task(user_email: str, token: str) -> bool:
-    email = generate_email(
-        user_email, token, html_forgot_password_msg, "Reset your password"
+def send_email_batch_task(
+    messages: list[tuple[str, str, dict[str, str]]],
+) -> int:
+    emails = deque(
+        (
+            user_email,
+            generate_email(user_email, template_id, variables).as_string(),
+        )
+        for user_email, template_id, variables in messages
     )
-    with smtplib.SMTP_SSL(config.SMTP_HOST, config.SMTP_PORT) as server:
-        server.login(config.SMTP_USER, config.SMTP_PASSWORD)
-        server.sendmail(config.SMTP_USER, user_email, email.as_string())
-    return True
+    return smtp_pool.send_many(emails)
@@ -0,0 +1,154 @@
+import os
+import queue
+import smtplib
+import socket
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from src.config import config
+from src.logging_config import logger
+
+# Only errors that mean the connection is gone; SMTPException subclasses
+# OSError too, but a refused recipient or bad data must not trigger a resend.
+_CONNECTION_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    ConnectionError,
+    socket.timeout,
+)
+# The server rejected one message; the session is still usable.
+_MESSAGE_ERRORS = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+)
+
+
+class SMTPPool:
+    def __init__(
+        self,
+        host: str | None = config.SMTP_HOST,
+        port: str | None = config.SMTP_PORT,
+        user: str | None = config.SMTP_USER,
+        password: str | None = config.SMTP_PASSWORD,
+        size: int = config.SMTP_POOL_SIZE,
+        max_idle: int = config.SMTP_POOL_MAX_IDLE,
+    ) -> None:
+        self.host = host
+        self.port = int(port) if port else 0
+        self.user = user
+        self.password = password
+        self.size = size
+        self.max_idle = max_idle
+        self._pid = os.getpid()
+        self._idle: queue.LifoQueue[tuple[smtplib.SMTP_SSL, float]] = (
+            queue.LifoQueue(size)
+        )
+
+    def _connect(self) -> smtplib.SMTP_SSL:
+        server = smtplib.SMTP_SSL(self.host, self.port)
+        server.login(self.user, self.password)
+        logger.info("SMTP connection opened", host=self.host)
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP_SSL) -> None:
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def _is_healthy(self, server: smtplib.SMTP_SSL, last_used: float) -> bool:
+        if time.monotonic() - last_used < self.max_idle:
+            return True
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _check_fork(self) -> None:
+        # Connections inherited from a parent process share its sockets.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = queue.LifoQueue(self.size)
+
+    def acquire(self) -> smtplib.SMTP_SSL:
+        self._check_fork()
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if self._is_healthy(server, last_used):
+                return server
+            self._close(server)
+
+    def release(self, server: smtplib.SMTP_SSL) -> None:
+        try:
+            self._idle.put_nowait((server, time.monotonic()))
+        except queue.Full:
+            self._close(server)
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP_SSL]:
+        server = self.acquire()
+        try:
+            yield server
+        except _CONNECTION_ERRORS:
+            server.close()
+            raise
+        except _MESSAGE_ERRORS:
+            self.release(server)
+            raise
+        except BaseException:
+            # State is unknown after anything else; don't pool it.
+            self._close(server)
+            raise
+        else:
+            self.release(server)
+
+    def send(self, recipient: str, message: str, retries: int = 1) -> None:
+        for attempt in range(retries + 1):
+            try:
+                with self.connection() as server:
+                    server.sendmail(self.user, recipient, message)
+                return
+            except _CONNECTION_ERRORS:
+                if attempt == retries:
+                    raise
+                logger.warning("SMTP connection lost, reconnecting")
+
+    def send_many(
+        self, pending: deque[tuple[str, str]], retries: int = 1
+    ) -> int:
+        # Consumes ``pending``; whatever is left in it was not sent.
+        sent = 0
+        failures = 0
+        while pending:
+            try:
+                with self.connection() as server:
+                    while pending:
+                        recipient, message = pending[0]
+                        try:
+                            server.sendmail(self.user, recipient, message)
+                            sent += 1
+                        except _MESSAGE_ERRORS:
+                            logger.exception(
+                                "SMTP rejected message", recipient=recipient
+                            )
+                        pending.popleft()
+            except _CONNECTION_ERRORS:
+                failures += 1
+                if failures > retries:
+                    raise
+                logger.warning("SMTP connection lost, reconnecting")
+        return sent
+
+    def close(self) -> None:
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
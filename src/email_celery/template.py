@@ -0,0 +1,44 @@
+import re
+from functools import cache
+from pathlib import Path
+
+from src.email_celery.constant import EMAIL_TEMPLATES
+
+TEMPLATE_DIR = Path(__file__).parent / "template"
+
+_SLOT = re.compile(r"\|(\w+)\|")
+
+
+class CompiledTemplate:
+    __slots__ = ("_parts", "_slots", "slots")
+
+    def __init__(self, source: str) -> None:
+        # re.split with a group alternates literal text and slot names.
+        self._parts = _SLOT.split(source)
+        self._slots = tuple(
+            (index, self._parts[index])
+            for index in range(1, len(self._parts), 2)
+        )
+        self.slots = frozenset(name for _, name in self._slots)
+
+    def render(self, variables: dict[str, str]) -> str:
+        parts = self._parts.copy()
+        for index, name in self._slots:
+            parts[index] = variables[name]
+        return "".join(parts)
+
+
+class EmailTemplate:
+    __slots__ = ("subject", "html", "text")
+
+    def __init__(self, subject: str, html: str, text: str) -> None:
+        self.subject = subject
+        self.html = CompiledTemplate(html)
+        self.text = CompiledTemplate(text)
+
+
+@cache
+def get_template(template_id: str) -> EmailTemplate:
+    file_name, subject, text = EMAIL_TEMPLATES[template_id]
+    html = (TEMPLATE_DIR / file_name).read_text(encoding="utf-8")
+    return EmailTemplate(subject, html, text)
@@ -2,19 +2,19 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
 from src.config import config
+from src.email_celery.template import get_template
 
 
 def generate_email(
-    user_email: str, token: str, html_msg: str, subject_msg: str
+    user_email: str, template_id: str, variables: dict[str, str]
 ) -> MIMEMultipart:
+    template = get_template(template_id)
     msg = MIMEMultipart("alternative")
-    msg["Subject"] = subject_msg
+    msg["Subject"] = template.subject
     msg["From"] = config.SMTP_USER
     msg["To"] = user_email
-    text = f"Hello, please confirm your email\nThis your token: {token}"
-    html_msg = html_msg.replace("|token|", token)
-    plain_msg = MIMEText(text, "plain")
-    html = MIMEText(html_msg, "html")
+    plain_msg = MIMEText(template.text.render(variables), "plain")
+    html = MIMEText(template.html.render(variables), "html")
     msg.attach(plain_msg)
     msg.attach(html)
     return msg
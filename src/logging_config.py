@@ -1,13 +1,13 @@
+import atexit
 import logging
 import os
+import queue
+import sys
+import threading
+from typing import TextIO
 
 import structlog
 
-level = os.environ.get("LOG_LEVEL")
-assert level
-
-LOG_LEVEL = getattr(logging, level)
-
 
 def get_renderer():
     if os.environ.get("PROD"):
@@ -15,22 +15,169 @@ def get_renderer():
     return structlog.dev.ConsoleRenderer()
 
 
-def get_logger_factory():
+def _capture_exc_info(logger, method_name: str, event_dict: dict) -> dict:
+    # The writer thread has no exception context, so resolve it here.
+    exc_info = event_dict.get("exc_info")
+    if exc_info is True:
+        event_dict["exc_info"] = sys.exc_info()
+    elif isinstance(exc_info, BaseException):
+        event_dict["exc_info"] = (
+            type(exc_info),
+            exc_info,
+            exc_info.__traceback__,
+        )
+    return event_dict
+
+
+def _defer(logger, method_name: str, event_dict: dict) -> tuple:
+    return (event_dict,), {}
+
+
+class QueueLogSink:
+    def __init__(
+        self,
+        file: TextIO,
+        processors: list,
+        maxsize: int = 10000,
+        batch_size: int = 256,
+        block: bool = False,
+    ) -> None:
+        self.file = file
+        self.processors = processors
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.block = block
+        self.dropped = 0
+        self._start()
+
+    def _start(self) -> None:
+        self._pid = os.getpid()
+        self._queue: queue.Queue = queue.Queue(self.maxsize)
+        self._thread = threading.Thread(
+            target=self._run, name="log-sink", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, event_dict: dict) -> None:
+        if self._pid != os.getpid():
+            # Forked (e.g. a Celery worker); the writer thread stayed behind.
+            self._start()
+        if self.block:
+            self._queue.put(event_dict)
+            return
+        try:
+            self._queue.put_nowait(event_dict)
+        except queue.Full:
+            self.dropped += 1
+
+    def _render(self, event_dict: dict) -> str:
+        result = event_dict
+        for processor in self.processors:
+            result = processor(None, "", result)
+        return result
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is None
+            lines = []
+            for event_dict in batch:
+                if event_dict is None:
+                    continue
+                try:
+                    lines.append(self._render(event_dict))
+                except Exception as exc:
+                    lines.append(f"log render failed: {exc!r} {event_dict!r}")
+            if self.dropped:
+                lines.append(f"log sink dropped {self.dropped} records")
+                self.dropped = 0
+            if lines:
+                self.file.write("\n".join(lines) + "\n")
+                self.file.flush()
+            if stop:
+                return
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+
+class QueueLogger:
+    def msg(self, event_dict: dict) -> None:
+        # Looked up per call so cached loggers follow a reconfigured sink.
+        if _sink is not None:
+            _sink.put(event_dict)
+
+    log = debug = info = warn = warning = msg
+    error = critical = exception = fatal = failure = msg
+
+
+_sink: QueueLogSink | None = None
+
+
+def get_log_file() -> TextIO:
     if os.environ.get("PROD"):
-        with open("logs/app.log", "w+t") as file:
-            return structlog.WriteLoggerFactory(file=file)
-
-    return structlog.PrintLoggerFactory()
-
-
-structlog.configure(
-    wrapper_class=structlog.make_filtering_bound_logger(LOG_LEVEL),
-    processors=[
-        structlog.contextvars.merge_contextvars,
-        structlog.processors.add_log_level,
-        structlog.processors.TimeStamper(fmt="iso", utc=True),
-        get_renderer(),
-    ],
-    logger_factory=get_logger_factory(),
-)
+        os.makedirs("logs", exist_ok=True)
+        return open("logs/app.log", "a", buffering=1 << 16)  # noqa: SIM115
+    return sys.stdout
+
+
+def get_sink() -> QueueLogSink:
+    renderer = get_renderer()
+    processors = [renderer]
+    if isinstance(renderer, structlog.processors.JSONRenderer):
+        processors.insert(0, structlog.processors.format_exc_info)
+    return QueueLogSink(
+        get_log_file(),
+        processors,
+        maxsize=int(os.environ.get("LOG_QUEUE_SIZE", 10000)),
+        batch_size=int(os.environ.get("LOG_BATCH_SIZE", 256)),
+        block=os.environ.get("LOG_QUEUE_POLICY", "drop") == "block",
+    )
+
+
+def configure_logging() -> None:
+    global _sink
+    level = os.environ.get("LOG_LEVEL")
+    assert level
+
+    shutdown_logging()
+    _sink = get_sink()
+
+    structlog.configure(
+        wrapper_class=structlog.make_filtering_bound_logger(
+            getattr(logging, level)
+        ),
+        processors=[
+            structlog.contextvars.merge_contextvars,
+            structlog.processors.add_log_level,
+            structlog.processors.TimeStamper(fmt="iso", utc=True),
+            _capture_exc_info,
+            _defer,
+        ],
+        logger_factory=lambda *args: QueueLogger(),
+    )
+
+
+def shutdown_logging() -> None:
+    global _sink
+    if _sink is not None:
+        _sink.close()
+        if _sink.file is not sys.stdout:
+            _sink.file.close()
+    _sink = None
+
+
+atexit.register(shutdown_logging)
+
+# structlog loggers are lazy proxies, so this picks up whatever
+# configure_logging() sets up later.
 logger = structlog.get_logger("main")
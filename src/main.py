@@ -1,33 +1,52 @@
+import time
 from collections.abc import Callable
 
 import structlog
 import uvicorn
 from fastapi import FastAPI, Request
+from fastapi.exception_handlers import request_validation_exception_handler
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 
-from src.auth.router import auth_router
-from src.logging_config import logger
+from src.logging_config import configure_logging, logger
+from src.metrics import http_request_duration, registry
 
 
 async def lifespan(app: FastAPI):
+    from src.auth.hasher import password_hasher
+    from src.auth.revocation import revocations
+    from src.auth.transport import close_redis
+    from src.database import dispose_engine, start_replica_monitor
+    from src.email_celery.backend import email_backend
+
+    await email_backend.start()
+    start_replica_monitor()
+    revocations.start()
+    registry.start()
     await logger.ainfo("app started")
     yield
-    await logger.ainfo("app stopped")
+    await revocations.stop()
+    await email_backend.stop()
+    password_hasher.shutdown()
+    await dispose_engine()
+    await close_redis()
+    await registry.stop()
+    await logger.ainfo(
+        "app stopped", password_hasher=password_hasher.stats.as_dict()
+    )
 
 
-app = FastAPI(lifespan=lifespan)
+async def validation_exception_handler(
+    request: Request, exc: RequestValidationError
+):
+    logger.warning("Request validation error", errors=exc.errors())
+    return await request_validation_exception_handler(request, exc)
 
-@app.exception_handler(RequestValidationError)
-async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    logger.exception("Request validation error")
-    logger.exception("Request validation error", exc_info=exc)
 
-@app.exception_handler(Exception)
 async def exception_handler(request: Request, exc: Exception):
     logger.exception("Internal server error", exc_info=exc)
 
-@app.middleware("http")
+
 async def logging_middleware(request: Request, call_next: Callable):
     structlog.contextvars.clear_contextvars()
     structlog.contextvars.bind_contextvars(
@@ -37,24 +56,58 @@ async def logging_middleware(request: Request, call_next: Callable):
         port=request.client.port,  # type: ignore
     )
 
+    started_at = time.perf_counter()
     response = await call_next(request)
-    
+    route = request.scope.get("route")
+    http_request_duration.observe(
+        time.perf_counter() - started_at,
+        request.method,
+        route.path if route is not None else "unmatched",
+        str(response.status_code),
+    )
+
     structlog.contextvars.bind_contextvars(
         status_code=response.status_code,
     )
     return response
 
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def create_app() -> FastAPI:
+    from src.admin.router import admin_router
+    from src.auth.router import auth_router, jwks_router
+    from src.dependencies import MetricsKeyDep
+    from src.metrics import metrics_router
 
-app.include_router(auth_router, tags=["auth"])
+    configure_logging()
+
+    app = FastAPI(lifespan=lifespan)
+    app.add_exception_handler(
+        RequestValidationError,
+        validation_exception_handler,  # type: ignore
+    )
+    app.add_exception_handler(Exception, exception_handler)
+    app.middleware("http")(logging_middleware)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    app.include_router(auth_router, tags=["auth"])
+    app.include_router(jwks_router)
+    app.include_router(admin_router, tags=["admin"])
+    app.include_router(metrics_router, dependencies=[MetricsKeyDep])
+    return app
 
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        "src.main:create_app",
+        factory=True,
+        host="0.0.0.0",
+        port=8000,
+        reload=True,
+    )
@@ -0,0 +1,317 @@
+import asyncio
+import contextlib
+import json
+import os
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+from functools import wraps
+from pathlib import Path
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.config import config
+from src.logging_config import logger
+
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = (
+        f'{name}="{str(value).replace(chr(34), chr(39))}"'
+        for name, value in zip(names, values, strict=True)
+    )
+    return ",".join(pairs)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def empty(self) -> "Counter":
+        return Counter(self.name, self.documentation, self.labelnames)
+
+    def dump(self) -> list:
+        return [
+            [list(labels), value] for labels, value in self._values.items()
+        ]
+
+    def load(self, entries: list) -> None:
+        for labels, value in entries:
+            self.inc(*labels, amount=value)
+
+    def samples(self) -> list[str]:
+        lines = []
+        for labels, value in self._values.items():
+            label_str = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}{{{label_str}}} {value}")
+        return lines
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def _state(self, labels: tuple[str, ...]) -> list:
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        return state
+
+    def observe(self, value: float, *labels: str) -> None:
+        state = self._state(labels)
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def empty(self) -> "Histogram":
+        return Histogram(
+            self.name, self.documentation, self.labelnames, self.buckets
+        )
+
+    def dump(self) -> list:
+        return [
+            [list(labels), counts, total]
+            for labels, (counts, total) in self._values.items()
+        ]
+
+    def load(self, entries: list) -> None:
+        for labels, counts, total in entries:
+            state = self._state(tuple(labels))
+            for i, count in enumerate(counts):
+                state[0][i] += count
+            state[1] += total
+
+    def samples(self) -> list[str]:
+        lines = []
+        for labels, (counts, total) in self._values.items():
+            label_str = _labels(self.labelnames, labels)
+            prefix = f"{label_str}," if label_str else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts, strict=False):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}'
+                )
+            cumulative += counts[-1]
+            lines.append(
+                f'{self.name}_bucket{{{prefix}le="+Inf"}} {cumulative}'
+            )
+            lines.append(f"{self.name}_sum{{{label_str}}} {total}")
+            lines.append(f"{self.name}_count{{{label_str}}} {cumulative}")
+        return lines
+
+
+class Registry:
+    # With several server processes, each one writes its values to
+    # {directory}/{pid}.json every sync_interval and /metrics, whichever
+    # process answers it, sums all the files. Files of exited workers are
+    # kept so counters never go backwards.
+    def __init__(
+        self, directory: str | None = None, sync_interval: float = 1.0
+    ) -> None:
+        self.metrics: list[Counter | Histogram] = []
+        self.directory = Path(directory) if directory else None
+        self.sync_interval = sync_interval
+        self._task: asyncio.Task | None = None
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def dump(self) -> None:
+        assert self.directory is not None
+        path = self.directory / f"{os.getpid()}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({metric.name: metric.dump() for metric in self.metrics})
+        )
+        os.replace(tmp, path)
+
+    def collect(self) -> list[Counter | Histogram]:
+        if self.directory is None:
+            return self.metrics
+        self.dump()
+        merged = {metric.name: metric.empty() for metric in self.metrics}
+        for path in self.directory.glob("*.json"):
+            try:
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            for name, entries in snapshot.items():
+                if name in merged:
+                    merged[name].load(entries)
+        return list(merged.values())
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.collect():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                self.dump()
+            except OSError as exc:
+                logger.warning("Metrics sync failed", error=str(exc))
+
+    def start(self) -> None:
+        if self.directory is not None and self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self.directory is not None:
+            self.dump()
+
+
+registry = Registry(config.METRICS_DIR, config.METRICS_SYNC_INTERVAL)
+
+http_request_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency",
+        ("method", "route", "status"),
+    )
+)
+db_pool_checkout_duration = registry.register(
+    Histogram(
+        "db_pool_checkout_seconds",
+        "Time spent waiting for a pooled database connection",
+        ("engine",),
+    )
+)
+db_query_duration = registry.register(
+    Histogram(
+        "db_query_duration_seconds", "Database query latency", ("engine",)
+    )
+)
+redis_command_duration = registry.register(
+    Histogram(
+        "redis_command_duration_seconds",
+        "RedisTransport call latency",
+        ("operation",),
+    )
+)
+password_hash_duration = registry.register(
+    Histogram(
+        "password_hash_duration_seconds",
+        "bcrypt hash and check time in the worker pool",
+        ("operation",),
+    )
+)
+password_hash_wait = registry.register(
+    Histogram(
+        "password_hash_wait_seconds",
+        "Time bcrypt calls wait for a free worker",
+        ("operation",),
+    )
+)
+token_crypto_duration = registry.register(
+    Histogram(
+        "token_crypto_duration_seconds",
+        "JWT and Fernet operation time",
+        ("operation",),
+    )
+)
+celery_published = registry.register(
+    Counter(
+        "celery_published_total", "Messages published to Celery", ("task",)
+    )
+)
+
+revocation_checks = registry.register(
+    Counter(
+        "revocation_checks_total",
+        "Session checks answered locally or by Redis",
+        ("path",),
+    )
+)
+
+
+def timed(histogram: Histogram, *labels: str) -> Callable:
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started_at = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started_at, *labels)
+
+        return wrapper
+
+    return decorator
+
+
+def timed_async(histogram: Histogram, *labels: str) -> Callable:
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            started_at = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started_at, *labels)
+
+        return wrapper
+
+    return decorator
+
+
+metrics_router = APIRouter(tags=["metrics"])
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4"
+    )
@@ -1,7 +1,8 @@
 import uuid
 from datetime import datetime
+from typing import Any
 
-from sqlalchemy import TIMESTAMP, text
+from sqlalchemy import JSON, TIMESTAMP, BigInteger, Index, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -30,8 +31,21 @@ class Base(DeclarativeBase):
 
 class User(Base):
     __tablename__ = "user_account"
+    __table_args__ = (
+        Index("ix_user_account_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     email: Mapped[str] = mapped_column(unique=True, index=True)
     first_name: Mapped[str]
     password: Mapped[str]
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    repr_cols = ("id", "recipient", "template")
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    recipient: Mapped[str]
+    template: Mapped[str]
+    variables: Mapped[dict[str, Any]] = mapped_column(JSON)
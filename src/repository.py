@@ -1,22 +1,49 @@
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import NamedTuple
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import Uuid, any_, bindparam, select, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.model import User
 from src.schema import UserCreate, UserRead
 
 
+class UserCredentials(NamedTuple):
+    id: UUID
+    email: str
+    first_name: str
+    password: str
+
+
 class AbstractRepository(ABC):
     @staticmethod
     @abstractmethod
-    async def get(user_id: UUID, session: AsyncSession) -> User | None:
+    async def get(user_id: UUID, session: AsyncSession) -> UserRead | None:
         raise NotImplementedError
 
     @staticmethod
     @abstractmethod
-    async def get_by_email(email: str, session: AsyncSession) -> User | None:
+    async def get_many(
+        user_ids: list[UUID], session: AsyncSession
+    ) -> list[UserRead]:
+        raise NotImplementedError
+
+    @staticmethod
+    @abstractmethod
+    async def get_by_email(
+        email: str, session: AsyncSession
+    ) -> UserRead | None:
+        raise NotImplementedError
+
+    @staticmethod
+    @abstractmethod
+    async def get_credentials(
+        email: str, session: AsyncSession
+    ) -> UserCredentials | None:
         raise NotImplementedError
 
     @staticmethod
@@ -26,28 +53,83 @@ class AbstractRepository(ABC):
 
     @staticmethod
     @abstractmethod
-    async def list(session: AsyncSession) -> list[User]:
+    async def set_password(
+        user_id: UUID, password: str, session: AsyncSession
+    ) -> None:
+        raise NotImplementedError
+
+    @staticmethod
+    @abstractmethod
+    async def list(
+        session: AsyncSession,
+        limit: int = 100,
+        after: tuple[datetime, UUID] | None = None,
+    ) -> list[User]:
         raise NotImplementedError
 
+    @staticmethod
+    @abstractmethod
+    def iterate(
+        session: AsyncSession, page_size: int = 1000
+    ) -> AsyncIterator[User]:
+        raise NotImplementedError
+
+
+# Hot lookups select plain columns: no identity map entries, no ORM
+# state, and rows come back from our own schema so they skip validation.
+_USER_READ_COLUMNS = (
+    User.id,
+    User.created_at,
+    User.update_at,
+    User.email,
+    User.first_name,
+)
+
+
+def _user_read(row) -> UserRead:
+    return UserRead.model_construct(
+        id=row.id,
+        create_at=row.created_at,
+        update_at=row.update_at,
+        email=row.email,
+        first_name=row.first_name,
+    )
+
 
 class UserRepository(AbstractRepository):
     @staticmethod
-    async def get(user_id: UUID, session: AsyncSession) -> User | None:
-        stmt = select(User).where(User.id == user_id)
-        result = await session.execute(stmt)
-        user = result.scalar_one_or_none()
-        UserRead.model_validate(user, from_attributes=True)
-        return user
+    async def get(user_id: UUID, session: AsyncSession) -> UserRead | None:
+        stmt = select(*_USER_READ_COLUMNS).where(User.id == user_id)
+        row = (await session.execute(stmt)).one_or_none()
+        return None if row is None else _user_read(row)
+
+    @staticmethod
+    async def get_many(
+        user_ids: list[UUID], session: AsyncSession
+    ) -> list[UserRead]:
+        # One array parameter keeps the statement text, and so the prepared
+        # statement, the same for every batch size, unlike IN (...).
+        ids = bindparam("user_ids", user_ids, type_=ARRAY(Uuid()))
+        stmt = select(*_USER_READ_COLUMNS).where(User.id == any_(ids))
+        return [_user_read(row) for row in await session.execute(stmt)]
+
+    @staticmethod
+    async def get_by_email(
+        email: str, session: AsyncSession
+    ) -> UserRead | None:
+        stmt = select(*_USER_READ_COLUMNS).where(User.email == email)
+        row = (await session.execute(stmt)).one_or_none()
+        return None if row is None else _user_read(row)
 
     @staticmethod
-    async def get_by_email(email: str, session: AsyncSession) -> User | None:
-        stmt = select(User).where(User.email == email)
-        result = await session.execute(stmt)
-        user = result.scalar_one_or_none()
-        if user is None:
-            return None
-        UserRead.model_validate(user, from_attributes=True)
-        return user
+    async def get_credentials(
+        email: str, session: AsyncSession
+    ) -> UserCredentials | None:
+        stmt = select(
+            User.id, User.email, User.first_name, User.password
+        ).where(User.email == email)
+        row = (await session.execute(stmt)).one_or_none()
+        return None if row is None else UserCredentials._make(row)
 
     @staticmethod
     async def add(user: UserCreate, session: AsyncSession) -> UserRead:
@@ -61,7 +143,48 @@ class UserRepository(AbstractRepository):
         return UserRead.model_validate(user_model, from_attributes=True)
 
     @staticmethod
-    async def list(session: AsyncSession) -> list[User]:
-        stmt = select(User)
-        result = await session.execute(stmt)
+    async def set_password(
+        user_id: UUID, password: str, session: AsyncSession
+    ) -> None:
+        await session.execute(
+            update(User).where(User.id == user_id).values(password=password)
+        )
+
+    @staticmethod
+    def _page(limit: int, after: tuple[datetime, UUID] | None = None):
+        stmt = select(User).order_by(User.created_at, User.id).limit(limit)
+        if after is not None:
+            stmt = stmt.where(
+                tuple_(User.created_at, User.id) > tuple_(*after)
+            )
+        return stmt
+
+    @staticmethod
+    async def list(
+        session: AsyncSession,
+        limit: int = 100,
+        after: tuple[datetime, UUID] | None = None,
+    ) -> list[User]:
+        result = await session.execute(UserRepository._page(limit, after))
         return list(result.scalars().all())
+
+    @staticmethod
+    async def iterate(
+        session: AsyncSession, page_size: int = 1000
+    ) -> AsyncIterator[User]:
+        after = None
+        while True:
+            stmt = UserRepository._page(page_size, after).execution_options(
+                yield_per=page_size
+            )
+            count = 0
+            user = None
+            async for user in await session.stream_scalars(stmt):
+                count += 1
+                yield user
+            # Ending the transaction returns the connection to the pool
+            # between pages instead of holding it for the whole scan.
+            await session.commit()
+            if user is None or count < page_size:
+                return
+            after = (user.created_at, user.id)
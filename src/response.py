@@ -0,0 +1,14 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class PydanticResponse(JSONResponse):
+    # Routes return this directly, so FastAPI skips re-validating the
+    # model and walking it with jsonable_encoder; the model's compiled
+    # serializer writes the JSON bytes in one pass.
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return super().render(content)
@@ -36,4 +36,4 @@ class BaseResponse(BaseModel):
 
 
 class HTTPResponse(BaseResponse):
-    detail: list | None = None
+    detail: list[UserRead] | None = None
@@ -0,0 +1,71 @@
+import math
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import uvicorn
+
+from src.config import config
+
+
+def available_cpus(cpu_max: str = "/sys/fs/cgroup/cpu.max") -> int:
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    # A container CPU limit (cgroup v2) doesn't show in the affinity mask.
+    try:
+        with open(cpu_max) as file:
+            quota, period = file.read().split()
+    except (OSError, ValueError):
+        return cpus
+    if quota != "max":
+        cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    return cpus
+
+
+def metrics_dir(workers: int) -> str | None:
+    # Workers share it so /metrics sums all of them (see Registry). Stale
+    # files from a previous run would inflate the counters.
+    if config.METRICS_DIR:
+        for path in Path(config.METRICS_DIR).glob("*.json"):
+            path.unlink()
+        return None
+    if workers == 1:
+        return None
+    directory = tempfile.mkdtemp(prefix="metrics-")
+    os.environ["METRICS_DIR"] = directory
+    return directory
+
+
+def main() -> None:
+    workers = config.SERVER_WORKERS or available_cpus()
+    created = metrics_dir(workers)
+    # The app is imported by import string in each worker (uvicorn spawns
+    # them), so engines, Redis, Celery and the log sink are all created
+    # per process; nothing is inherited from this supervisor.
+    try:
+        uvicorn.run(
+            "src.main:create_app",
+            factory=True,
+            host=config.SERVER_HOST,
+            port=config.SERVER_PORT,
+            workers=workers,
+            loop=config.SERVER_LOOP,
+            http=config.SERVER_HTTP,
+            backlog=config.SERVER_BACKLOG,
+            timeout_keep_alive=config.SERVER_KEEP_ALIVE,
+            timeout_graceful_shutdown=config.SERVER_GRACEFUL_TIMEOUT,
+            limit_concurrency=config.SERVER_LIMIT_CONCURRENCY,
+            # Requests are already logged by logging_middleware.
+            access_log=False,
+            server_header=False,
+        )
+    finally:
+        if created is not None:
+            shutil.rmtree(created, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
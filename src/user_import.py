@@ -0,0 +1,197 @@
+import argparse
+import asyncio
+import csv
+import json
+import sys
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
+from pathlib import Path
+from typing import TextIO
+from uuid import uuid4
+
+import asyncpg
+from pydantic import ValidationError
+
+from src.auth.util import get_password_hash
+from src.config import config
+from src.database import statement_cache_size
+from src.logging_config import configure_logging, logger
+from src.schema import UserCreate
+
+# Created per transaction so the import also works through PgBouncer in
+# transaction mode, where consecutive transactions may land on different
+# server connections.
+_STAGING_TABLE = """
+CREATE TEMP TABLE user_import (
+    id uuid,
+    email text,
+    first_name text,
+    password text
+) ON COMMIT DROP
+"""
+
+_INSERT_FROM_STAGING = """
+INSERT INTO user_account (id, email, first_name, password)
+SELECT id, email, first_name, password FROM user_import
+ON CONFLICT (email) DO NOTHING
+RETURNING email
+"""
+
+
+class ImportReport:
+    def __init__(self) -> None:
+        self.total = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.invalid = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "total": self.total,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+        }
+
+
+def read_rows(file: TextIO, fmt: str) -> Iterator[dict | None]:
+    # None for lines that aren't a JSON object, so they're counted as
+    # invalid rather than ending the import.
+    if fmt == "csv":
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else None
+
+
+def chunked(
+    rows: Iterator[dict | None], size: int
+) -> Iterator[list[dict | None]]:
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+async def _hash_passwords(
+    pool: ProcessPoolExecutor, passwords: list[str]
+) -> list[str]:
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(
+        *(
+            loop.run_in_executor(pool, get_password_hash, password)
+            for password in passwords
+        )
+    )
+
+
+async def import_users(
+    file: TextIO,
+    fmt: str,
+    duplicates_out: TextIO,
+    chunk_size: int = 5000,
+    workers: int | None = None,
+) -> ImportReport:
+    report = ImportReport()
+    conn = await asyncpg.connect(
+        config.POSTGRES_URL.replace("+asyncpg", ""),
+        statement_cache_size=statement_cache_size(),
+    )
+    try:
+        with ProcessPoolExecutor(workers) as pool:
+            for chunk in chunked(read_rows(file, fmt), chunk_size):
+                users: dict[str, UserCreate] = {}
+                for row in chunk:
+                    report.total += 1
+                    try:
+                        user = UserCreate.model_validate(row)
+                    except ValidationError:
+                        report.invalid += 1
+                        logger.warning("Invalid row", row=report.total)
+                        continue
+                    if user.email in users:
+                        report.duplicates += 1
+                        duplicates_out.write(f"{user.email}\n")
+                        continue
+                    users[user.email] = user
+
+                hashes = await _hash_passwords(
+                    pool, [user.password for user in users.values()]
+                )
+                records = [
+                    (uuid4(), user.email, user.first_name, password)
+                    for user, password in zip(
+                        users.values(), hashes, strict=True
+                    )
+                ]
+                async with conn.transaction():
+                    await conn.execute(_STAGING_TABLE)
+                    await conn.copy_records_to_table(
+                        "user_import",
+                        records=records,
+                        columns=["id", "email", "first_name", "password"],
+                    )
+                    inserted = {
+                        row["email"]
+                        for row in await conn.fetch(_INSERT_FROM_STAGING)
+                    }
+
+                report.inserted += len(inserted)
+                for email in users.keys() - inserted:
+                    report.duplicates += 1
+                    duplicates_out.write(f"{email}\n")
+                logger.info("Chunk imported", **report.as_dict())
+    finally:
+        await conn.close()
+    return report
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.user_import",
+        description="Bulk import users from CSV or NDJSON "
+        "(columns: email, first_name, password)",
+    )
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default=None)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--duplicates",
+        type=Path,
+        default=None,
+        help="file to write duplicate emails to (default: stdout)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    configure_logging()
+    fmt = args.format or ("csv" if args.path.suffix == ".csv" else "ndjson")
+    duplicates = (
+        open(args.duplicates, "w")  # noqa: SIM115
+        if args.duplicates
+        else nullcontext(sys.stdout)
+    )
+    with open(args.path, newline="") as file, duplicates as duplicates_out:
+        report = asyncio.run(
+            import_users(
+                file,
+                fmt,
+                duplicates_out,
+                chunk_size=args.chunk_size,
+                workers=args.workers,
+            )
+        )
+    print(json.dumps(report.as_dict()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
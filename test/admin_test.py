@@ -0,0 +1,153 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.admin import router as admin_module
+from src.admin.router import admin_router
+from src.config import config
+from src.model import User
+from src.repository import UserRepository
+
+
+class AsyncSessionAdapter:
+    # Just enough of AsyncSession over a sync SQLite session to run the
+    # repository's real statements.
+    def __init__(self, session: Session) -> None:
+        self.session = session
+        self.commits = 0
+
+    async def execute(self, stmt):
+        return self.session.execute(stmt)
+
+    async def stream_scalars(self, stmt):
+        async def rows():
+            for row in self.session.scalars(stmt):
+                yield row
+
+        return rows()
+
+    async def commit(self) -> None:
+        self.commits += 1
+        self.session.commit()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        pass
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    created_at = datetime(2026, 1, 1)
+    with Session(engine) as session:
+        # Pairs share a created_at, so pages must break ties on id.
+        for i in range(7):
+            session.add(
+                User(
+                    id=uuid.uuid4(),
+                    email=f"{i}@example.com",
+                    first_name=f"user{i}",
+                    password="hash",
+                    created_at=created_at + timedelta(seconds=i // 2),
+                )
+            )
+        session.commit()
+        yield AsyncSessionAdapter(session)
+
+
+def ordered(users: list[User]) -> list[uuid.UUID]:
+    return [
+        user.id for user in sorted(users, key=lambda u: (u.created_at, u.id))
+    ]
+
+
+@pytest.mark.asyncio
+async def test_list_pages_with_the_after_cursor(session):
+    everyone = await UserRepository.list(session, limit=100)
+    assert len(everyone) == 7
+
+    pages = []
+    after = None
+    while page := await UserRepository.list(session, limit=2, after=after):
+        assert len(page) <= 2
+        pages.append(page)
+        after = (page[-1].created_at, page[-1].id)
+
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+    seen = [user.id for page in pages for user in page]
+    assert seen == ordered(everyone)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("page_size", [1, 2, 3, 7, 8])
+async def test_iterate_yields_every_user_once(session, page_size):
+    everyone = await UserRepository.list(session, limit=100)
+
+    seen = [
+        user.id async for user in UserRepository.iterate(session, page_size)
+    ]
+
+    assert seen == ordered(everyone)
+    # One transaction per page, plus the short (or empty) last one.
+    assert session.commits == 7 // page_size + 1
+
+
+@pytest.fixture
+def client(session, monkeypatch):
+    monkeypatch.setattr(config, "ADMIN_API_KEY", "admin")
+    monkeypatch.setattr(admin_module, "get_read_session", lambda: None)
+    monkeypatch.setattr(admin_module, "get_session", lambda: session)
+    app = FastAPI()
+    app.include_router(admin_router)
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+@pytest.mark.asyncio
+async def test_users_stream_as_ndjson(client, session):
+    everyone = await UserRepository.list(session, limit=100)
+
+    async with client:
+        response = await client.get(
+            "/admin/users",
+            params={"page_size": 3},
+            headers={"X-API-Key": "admin"},
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert [uuid.UUID(json.loads(line)["id"]) for line in lines] == ordered(
+        everyone
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("headers", [{}, {"X-API-Key": "wrong"}])
+async def test_users_require_the_admin_key(client, headers):
+    async with client:
+        response = await client.get("/admin/users", headers=headers)
+
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_users_are_closed_without_a_configured_key(client, monkeypatch):
+    monkeypatch.setattr(config, "ADMIN_API_KEY", None)
+
+    async with client:
+        response = await client.get(
+            "/admin/users", headers={"X-API-Key": "admin"}
+        )
+
+    assert response.status_code == 403
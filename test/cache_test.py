@@ -0,0 +1,218 @@
+import time
+import uuid
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import pytest
+from fakeredis import FakeAsyncRedis
+from fastapi import HTTPException
+
+from src import cache as cache_module
+from src import dependencies
+from src.auth import service as service_module
+from src.auth import transport as transport_module
+from src.auth import util
+from src.auth.service import UserManager
+from src.auth.transport import RedisTransport
+from src.auth.util import _token_cache, create_jwt_token, verify_jwt_token
+from src.cache import TTLCache, UserCache
+from src.config import config
+from src.schema import UserRead
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_respects_expire_at():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1, expire_at=time.time() - 1)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_verify_jwt_token_is_cached_and_agent_bound():
+    token = create_jwt_token(uuid.uuid4(), "agent", "key")
+
+    payload = verify_jwt_token(token.access_token, "agent")
+    assert payload == token.payload
+    assert verify_jwt_token(token.access_token, "agent") is payload
+
+    with pytest.raises(HTTPException):
+        verify_jwt_token(token.access_token, "other agent")
+    with pytest.raises(HTTPException):
+        verify_jwt_token(token.access_token, "agent", iss="other")
+    _token_cache.clear()
+
+
+def test_compact_tokens_and_legacy_migration(monkeypatch):
+    compact = create_jwt_token(uuid.uuid4(), "agent", "refresh")
+    assert compact.payload.ag is None and compact.payload.ks is None
+    assert "refresh" not in compact.access_token
+
+    monkeypatch.setattr(config, "TOKEN_FORMAT", "legacy")
+    legacy = create_jwt_token(uuid.uuid4(), "agent", "refresh")
+    assert len(compact.access_token) < len(legacy.access_token)
+    assert verify_jwt_token(legacy.access_token, "agent").ag == "agent"
+    assert verify_jwt_token(compact.access_token, "agent").sf
+    _token_cache.clear()
+
+    monkeypatch.setattr(config, "TOKEN_ACCEPT_LEGACY", False)
+    with pytest.raises(HTTPException):
+        verify_jwt_token(legacy.access_token, "agent")
+    assert verify_jwt_token(compact.access_token, "agent").af
+    _token_cache.clear()
+
+
+def test_fingerprint_key_is_required(monkeypatch):
+    monkeypatch.setattr(config, "TOKEN_FINGERPRINT_KEY", None)
+    util._fingerprint_key.cache_clear()
+    try:
+        with pytest.raises(RuntimeError):
+            create_jwt_token(uuid.uuid4(), "agent", "refresh")
+    finally:
+        util._fingerprint_key.cache_clear()
+
+
+def make_user() -> UserRead:
+    return UserRead.model_construct(
+        id=uuid.uuid4(),
+        create_at=datetime.now(UTC),
+        update_at=None,
+        email="user@example.com",
+        first_name="user",
+    )
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    monkeypatch.setattr(
+        transport_module, "_redis", FakeAsyncRedis(decode_responses=True)
+    )
+    return RedisTransport()
+
+
+@pytest.mark.asyncio
+async def test_user_cache_local_hit(transport):
+    cache = UserCache(transport, maxsize=10, local_ttl=5, redis_ttl=60)
+    user = make_user()
+    await cache.set(user)
+    await transport.redis.flushall()
+
+    assert await cache.get(user.id) is user
+
+
+@pytest.mark.asyncio
+async def test_user_cache_redis_hit_fills_local(transport):
+    user = make_user()
+    await UserCache(transport, 10, 5, 60).set(user)
+    # Another worker: empty local tier, same Redis.
+    cache = UserCache(transport, 10, 5, 60)
+
+    cached = await cache.get(user.id)
+    assert cached == user
+    assert cache.local.get(user.id) == user
+    assert await transport.redis.ttl(f"user:{user.id}") == 60
+
+
+@pytest.mark.asyncio
+async def test_user_cache_local_tier_expires(transport, monkeypatch):
+    cache = UserCache(transport, maxsize=10, local_ttl=5, redis_ttl=60)
+    user = make_user()
+    await cache.set(user)
+    await transport.redis.flushall()
+
+    now = time.time()
+    monkeypatch.setattr(cache_module.time, "time", lambda: now + 6)
+    assert await cache.get(user.id) is None
+
+
+@pytest.mark.asyncio
+async def test_user_cache_invalidate_clears_both_tiers(transport):
+    cache = UserCache(transport, maxsize=10, local_ttl=5, redis_ttl=60)
+    user = make_user()
+    await cache.set(user)
+
+    await cache.invalidate(user.id)
+
+    assert cache.local.get(user.id) is None
+    assert await transport.redis.get(f"user:{user.id}") is None
+    assert await cache.get(user.id) is None
+
+
+@pytest.mark.asyncio
+async def test_current_user_misses_to_db_then_fills(transport, monkeypatch):
+    cache = UserCache(transport, maxsize=10, local_ttl=5, redis_ttl=60)
+    monkeypatch.setattr(dependencies, "user_cache", cache)
+    user = make_user()
+    lookups = []
+
+    async def get(user_id, session):
+        lookups.append(session)
+        return user if user_id == user.id else None
+
+    monkeypatch.setattr(dependencies.UserRepository, "get", get)
+    token = create_jwt_token(user.id, "agent", "refresh").access_token
+    request = SimpleNamespace(headers={"user-agent": "agent"})
+
+    for _ in range(2):
+        found, _ = await dependencies.get_current_user(
+            request, token, "primary", "replica"
+        )
+        assert found == user
+
+    assert lookups == ["replica"]
+    assert await transport.redis.get(f"user:{user.id}") is not None
+    _token_cache.clear()
+
+
+class PasswordRepository:
+    def __init__(self) -> None:
+        self.passwords: dict[uuid.UUID, str] = {}
+
+    async def set_password(self, user_id, password, session) -> None:
+        self.passwords[user_id] = password
+
+
+class FakeSession:
+    async def commit(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_reset_password_invalidates_cached_user(transport, monkeypatch):
+    cache = UserCache(transport, maxsize=10, local_ttl=5, redis_ttl=60)
+    monkeypatch.setattr(service_module, "user_cache", cache)
+    manager = UserManager(db=PasswordRepository())
+    user = make_user()
+    request = SimpleNamespace(headers={"user-agent": "agent"})
+    await cache.set(user)
+    await transport.set(str(user.id), "agent", "123456", 300, iss="forgot")
+
+    with pytest.raises(HTTPException):
+        await manager.reset_password(
+            user, "000000", "new password", request, FakeSession()
+        )
+    # The wrong guess burned the code.
+    with pytest.raises(HTTPException):
+        await manager.reset_password(
+            user, "123456", "new password", request, FakeSession()
+        )
+    assert await cache.get(user.id) == user
+
+    await transport.set(str(user.id), "agent", "654321", 300, iss="forgot")
+    await manager.reset_password(
+        user, "654321", "new password", request, FakeSession()
+    )
+
+    assert user.id in manager.db.passwords
+    assert await cache.get(user.id) is None
@@ -0,0 +1,157 @@
+import itertools
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+
+from src import database
+from src.database import (
+    Replica,
+    connect_args,
+    get_read_session,
+    statement_name,
+)
+
+
+class FakeResult:
+    def __init__(self, row: tuple) -> None:
+        self.row = row
+
+    def one(self) -> tuple:
+        return self.row
+
+
+class FakeConnection:
+    def __init__(self, engine: "FakeEngine") -> None:
+        self.engine = engine
+
+    async def __aenter__(self) -> "FakeConnection":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        pass
+
+    async def execute(self, statement) -> FakeResult:
+        if self.engine.row is None:
+            raise OperationalError(str(statement), {}, Exception("down"))
+        return FakeResult(self.engine.row)
+
+
+class FakeEngine:
+    # A row of pg_stat_wal_receiver.status, seconds since its last message,
+    # whether everything received is replayed, and the last replay's age.
+    def __init__(self, row: tuple | None) -> None:
+        self.row = row
+
+    def connect(self) -> FakeConnection:
+        return FakeConnection(self)
+
+
+def fake_replica(name: str, row: tuple | None) -> Replica:
+    replica = Replica(name, FakeEngine(row), stall_timeout=45.0)
+    replica.session_maker = lambda: name
+    return replica
+
+
+@pytest.fixture
+def replicas(monkeypatch):
+    replicas = [
+        fake_replica("replica0", ("streaming", 0.1, True, 600.0)),
+        fake_replica("replica1", ("streaming", 0.1, False, 0.5)),
+        fake_replica("replica2", ("streaming", 0.1, False, 30.0)),
+    ]
+    monkeypatch.setattr(database, "_replicas", replicas)
+    return replicas
+
+
+@pytest.mark.asyncio
+async def test_reads_use_primary_until_replicas_are_checked(replicas):
+    assert get_read_session() is None
+
+    await database.check_replicas(max_lag=1.0)
+
+    picked = {get_read_session() for _ in range(4)}
+    assert picked == {"replica0", "replica1"}
+    assert [replica.lag for replica in replicas] == [0.0, 0.5, 30.0]
+
+
+@pytest.mark.asyncio
+async def test_lagging_replicas_fall_back_to_primary(replicas):
+    await database.check_replicas(max_lag=0.1)
+    assert {get_read_session() for _ in range(4)} == {"replica0"}
+
+    replicas[0].engine.row = None
+    await database.check_replicas(max_lag=0.1)
+    assert get_read_session() is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "row,lag,healthy",
+    [
+        # Caught up, however old the last replayed transaction.
+        (("streaming", 1.0, True, 600.0), 0.0, True),
+        (("streaming", 1.0, False, 1.5), 1.5, True),
+        (("streaming", 1.0, False, 5.0), 5.0, False),
+        # No WAL receiver: nothing to measure against.
+        ((None, None, True, None), None, False),
+        # Receiver down, or silent past the stall timeout, even though
+        # everything it did receive is replayed.
+        (("stopping", 3.0, True, 3.0), 3.0, False),
+        (("streaming", 60.0, True, 60.0), 60.0, False),
+    ],
+)
+async def test_replica_check(row, lag, healthy):
+    replica = fake_replica("replica0", row)
+
+    assert await replica.check(max_lag=2.0) is healthy
+    assert replica.lag == lag
+    assert replica.healthy is healthy
+
+
+def test_pgbouncer_mode_disables_caches_and_names_statements():
+    args = connect_args("pgbouncer")
+    assert args["statement_cache_size"] == 0
+    assert args["prepared_statement_cache_size"] == 0
+    assert args["prepared_statement_name_func"] is statement_name
+
+
+def test_direct_mode_uses_configured_cache(monkeypatch):
+    monkeypatch.setattr(database.config, "POSTGRES_STATEMENT_CACHE_SIZE", 50)
+    args = connect_args("direct")
+    assert args["statement_cache_size"] == 50
+    assert args["prepared_statement_cache_size"] == 50
+    assert "prepared_statement_name_func" not in args
+
+
+def test_statement_names_are_unique_per_process():
+    first, second = statement_name(), statement_name()
+    assert first != second
+    assert first.rsplit("_", 3)[0] == second.rsplit("_", 3)[0]
+    assert len(first) < 64
+
+
+def test_statement_names_change_across_restarts(monkeypatch):
+    # A restarted process with the same pid must not reuse names.
+    before = statement_name()
+    monkeypatch.setattr(database, "_statement_prefix", None)
+    monkeypatch.setattr(database, "_statement_counter", itertools.count())
+    assert statement_name().rsplit("_", 3)[0] != before.rsplit("_", 3)[0]
+
+
+def test_failed_queries_leave_no_timing_state(monkeypatch):
+    observed = []
+    monkeypatch.setattr(
+        database.db_query_duration, "observe", lambda *a: observed.append(a)
+    )
+    engine = create_engine("sqlite://", logging_name="test")
+    for name in ("before_cursor_execute", "after_cursor_execute"):
+        event.listen(engine, name, getattr(database, f"_{name}"))
+
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing"))
+        conn.execute(text("SELECT 1"))
+        assert "query_started_at" not in conn.info
+
+    assert len(observed) == 1
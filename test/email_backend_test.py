@@ -0,0 +1,46 @@
+import pytest
+
+from src.email_celery.backend import AsyncioEmailBackend
+
+
+class FakePool:
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.sent: list[str] = []
+
+    def send_many(self, pending) -> int:
+        if self.failures:
+            self.failures -= 1
+            raise OSError("connection lost")
+        sent = 0
+        while pending:
+            self.sent.append(pending.popleft()[0])
+            sent += 1
+        return sent
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_queue_is_drained_on_stop():
+    pool = FakePool(failures=1)
+    backend = AsyncioEmailBackend(retry_backoff=0, smtp_pool=pool)
+    await backend.start()
+
+    for i in range(3):
+        assert backend.send(f"{i}@a.com", "confirm_email", {"token": "1"})
+    await backend.stop()
+
+    assert sorted(pool.sent) == ["0@a.com", "1@a.com", "2@a.com"]
+    assert not backend.send("a@a.com", "confirm_email", {"token": "1"})
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects():
+    backend = AsyncioEmailBackend(queue_size=1, smtp_pool=FakePool())
+    await backend.start()
+
+    assert backend.send("a@a.com", "confirm_email", {"token": "1"})
+    assert not backend.send("b@b.com", "confirm_email", {"token": "1"})
+    await backend.stop()
@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.auth.hasher import PasswordHasher
+
+
+@pytest.mark.asyncio
+async def test_hash_and_check():
+    hasher = PasswordHasher(max_workers=2, max_pending=4)
+    hashed = await hasher.hash_password("12345678")
+
+    assert await hasher.check_password("12345678", hashed)
+    assert not await hasher.check_password("87654321", hashed)
+    assert hasher.stats.calls == 3
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_reject_when_queue_is_full():
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+
+    results = await asyncio.gather(
+        hasher.hash_password("12345678"),
+        hasher.hash_password("12345678"),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[1], HTTPException)
+    assert results[1].status_code == 503
+    assert hasher.stats.rejected == 1
+    hasher.shutdown()
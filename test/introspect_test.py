@@ -0,0 +1,143 @@
+import uuid
+from datetime import UTC, datetime
+
+import httpx
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from src.auth import service as service_module
+from src.auth import transport as transport_module
+from src.auth.revocation import Revocations, RevocationState
+from src.auth.schema.request import IntrospectItem
+from src.auth.service import UserManager
+from src.auth.transport import RedisTransport
+from src.auth.util import _token_cache, create_jwt_token
+from src.cache import user_cache
+from src.config import config
+from src.schema import UserRead
+
+
+def make_user() -> UserRead:
+    return UserRead.model_construct(
+        id=uuid.uuid4(),
+        create_at=datetime.now(UTC),
+        update_at=None,
+        email="user@example.com",
+        first_name="user",
+    )
+
+
+class Repository:
+    # The replica hasn't replayed users added to ``primary_only`` yet.
+    def __init__(self) -> None:
+        self.users: dict[uuid.UUID, UserRead] = {}
+        self.primary_only: set[uuid.UUID] = set()
+        self.sessions: list[str] = []
+
+    async def get_many(self, user_ids, session):
+        self.sessions.append(session)
+        return [
+            self.users[user_id]
+            for user_id in user_ids
+            if user_id in self.users
+            and (session == "primary" or user_id not in self.primary_only)
+        ]
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(
+        transport_module, "_redis", FakeAsyncRedis(decode_responses=True)
+    )
+    revocations = Revocations(RedisTransport(), RevocationState(60, 1))
+    monkeypatch.setattr(service_module, "revocations", revocations)
+    user_cache.local.clear()
+    _token_cache.clear()
+    yield UserManager(db=Repository())
+    _token_cache.clear()
+
+
+async def login(manager: UserManager, user: UserRead, agent: str) -> str:
+    refresh_token = uuid.uuid4().hex
+    await manager.transpot.set(str(user.id), agent, refresh_token)
+    manager.db.users[user.id] = user
+    return create_jwt_token(user.id, agent, refresh_token).access_token
+
+
+@pytest.mark.asyncio
+async def test_introspect_resolves_a_batch_in_order(manager):
+    fresh, known, rotated = make_user(), make_user(), make_user()
+    manager.db.primary_only.add(fresh.id)
+    fresh_token = await login(manager, fresh, "agent")
+    known_token = await login(manager, known, "agent")
+    rotated_token = await login(manager, rotated, "agent")
+    await manager.transpot.set(str(rotated.id), "agent", "new")
+
+    response = await manager.introspect(
+        [
+            IntrospectItem(token=fresh_token, agent="agent"),
+            IntrospectItem(token=fresh_token, agent="other"),
+            IntrospectItem(token=known_token[:-2] + "xx", agent="agent"),
+            IntrospectItem(token=known_token, agent="agent"),
+            IntrospectItem(token=rotated_token, agent="agent"),
+        ],
+        session="primary",
+        read_session="replica",
+    )
+
+    assert [result.active for result in response.detail] == [
+        True,
+        False,
+        False,
+        True,
+        False,
+    ]
+    assert response.detail[0].user.id == fresh.id
+    assert response.detail[3].user.id == known.id
+    # One replica query, then the primary for the one it missed.
+    assert manager.db.sessions == ["replica", "primary"]
+
+
+@pytest.mark.asyncio
+async def test_introspect_answers_revoked_tokens_locally(manager, monkeypatch):
+    user = make_user()
+    token = await login(manager, user, "agent")
+    revocations = service_module.revocations
+    revocations.state.touch()
+    payload = service_module.verify_jwt_token(token, "agent")
+    await revocations.revoke_session(payload)
+
+    lookups = []
+
+    async def get_many(sessions):
+        lookups.extend(sessions)
+        return [None] * len(sessions)
+
+    monkeypatch.setattr(manager.transpot, "get_many", get_many)
+    response = await manager.introspect(
+        [IntrospectItem(token=token, agent="agent")], "primary", "replica"
+    )
+
+    assert response.detail[0].active is False
+    assert lookups == []
+
+
+@pytest.mark.asyncio
+async def test_introspect_requires_its_own_key(monkeypatch):
+    from src.main import create_app
+
+    monkeypatch.setattr(config, "ADMIN_API_KEY", "admin")
+    monkeypatch.setattr(config, "INTROSPECT_API_KEY", None)
+    body = {"tokens": [{"token": "token", "agent": "agent"}]}
+    transport = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test"
+    ) as client:
+        unset = await client.post(
+            "/auth/introspect", json=body, headers={"X-API-Key": "admin"}
+        )
+        monkeypatch.setattr(config, "INTROSPECT_API_KEY", "gateway")
+        missing = await client.post("/auth/introspect", json=body)
+
+    assert unset.status_code == 403
+    assert missing.status_code == 403
@@ -0,0 +1,77 @@
+import json
+
+import jwt
+import pytest
+
+from src.auth.fingerprint import agent_fingerprint
+from src.auth.keys import KeyRing, generate_key
+from src.auth.verifier import TokenVerifier
+
+
+@pytest.fixture
+def key_ring(tmp_path):
+    (tmp_path / "2024-01.pem").write_bytes(generate_key("EdDSA"))
+    (tmp_path / "2024-02.pem").write_bytes(generate_key("EdDSA"))
+    return KeyRing(
+        "EdDSA", str(tmp_path), kid=None, secret="legacy", accept_hs256=True
+    )
+
+
+def sign(key_ring: KeyRing, claims: dict) -> str:
+    kid, key = key_ring.signing_key
+    return jwt.encode(
+        claims, key, algorithm=key_ring.algorithm, headers={"kid": kid}
+    )
+
+
+def test_key_ring_signs_with_newest_key_and_publishes_all(key_ring):
+    kid, _ = key_ring.signing_key
+    jwks = json.loads(key_ring.jwks)
+
+    assert kid == "2024-02"
+    assert [key["kid"] for key in jwks["keys"]] == ["2024-01", "2024-02"]
+    assert all("d" not in key for key in jwks["keys"])
+    assert key_ring.verification_key(None) == ("legacy", "HS256")
+    with pytest.raises(jwt.InvalidTokenError):
+        key_ring.verification_key("unknown")
+
+
+def test_legacy_hs256_is_rejected_unless_opted_in(key_ring):
+    key_ring.accept_hs256 = False
+    key_ring.load()
+
+    with pytest.raises(jwt.InvalidTokenError):
+        key_ring.verification_key(None)
+
+
+def test_verifier_validates_offline_from_jwks(key_ring, monkeypatch):
+    verifier = TokenVerifier("http://auth/.well-known/jwks.json")
+    fetches = []
+
+    def fetch_data():
+        fetches.append(1)
+        return json.loads(key_ring.jwks)
+
+    monkeypatch.setattr(verifier.jwks, "fetch_data", fetch_data)
+    claims = {"iss": "authserver", "sub": "1", "iat": 0, "exp": 2**40}
+    token = sign(key_ring, {**claims, "ag": "agent"})
+
+    assert verifier.verify(token, agent="agent")["sub"] == "1"
+    assert verifier.verify(token)["sub"] == "1"
+    assert len(fetches) == 1
+    with pytest.raises(jwt.InvalidTokenError):
+        verifier.verify(token, agent="other")
+
+
+def test_verifier_checks_compact_agent_fingerprint(key_ring, monkeypatch):
+    verifier = TokenVerifier("http://auth/.well-known/jwks.json")
+    monkeypatch.setattr(
+        verifier.jwks, "fetch_data", lambda: json.loads(key_ring.jwks)
+    )
+    claims = {"iss": "authserver", "sub": "1", "iat": 0, "exp": 2**40}
+    af = agent_fingerprint("agent")
+    token = sign(key_ring, {**claims, "sf": "sf", "af": af})
+
+    assert verifier.verify(token, agent="agent")["sub"] == "1"
+    with pytest.raises(jwt.InvalidTokenError):
+        verifier.verify(token, agent="other")
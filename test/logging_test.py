@@ -0,0 +1,64 @@
+import io
+import json
+import threading
+import time
+
+import structlog
+
+from src.logging_config import QueueLogSink, _capture_exc_info
+
+
+def test_sink_writes_batches_on_close():
+    file = io.StringIO()
+    sink = QueueLogSink(file, [structlog.processors.JSONRenderer()])
+    for i in range(3):
+        sink.put({"event": "hello", "i": i})
+    sink.close()
+
+    lines = file.getvalue().splitlines()
+    assert [json.loads(line)["i"] for line in lines] == [0, 1, 2]
+
+
+def test_sink_drops_when_full():
+    release = threading.Event()
+
+    def slow_render(logger, method_name, event_dict):
+        release.wait()
+        return event_dict["event"]
+
+    file = io.StringIO()
+    sink = QueueLogSink(file, [slow_render], maxsize=1)
+    sink.put({"event": "first"})
+    while sink._queue.qsize():
+        time.sleep(0.001)
+    sink.put({"event": "second"})
+    sink.put({"event": "third"})
+    assert sink.dropped == 1
+
+    release.set()
+    sink.close()
+    assert file.getvalue().splitlines() == [
+        "first",
+        "log sink dropped 1 records",
+        "second",
+    ]
+
+
+def test_exc_info_is_captured_on_calling_thread():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        event_dict = _capture_exc_info(None, "error", {"exc_info": True})
+
+    sink_file = io.StringIO()
+    sink = QueueLogSink(
+        sink_file,
+        [
+            structlog.processors.format_exc_info,
+            structlog.processors.JSONRenderer(),
+        ],
+    )
+    sink.put(event_dict)
+    sink.close()
+
+    assert "ValueError: boom" in json.loads(sink_file.getvalue())["exception"]
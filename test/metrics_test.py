@@ -0,0 +1,48 @@
+from src.metrics import Counter, Histogram, Registry
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", ("op",), (0.1, 1.0))
+    histogram.observe(0.05, "get")
+    histogram.observe(0.5, "get")
+    histogram.observe(5.0, "get")
+
+    lines = histogram.samples()
+    assert 'latency_seconds_bucket{op="get",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{op="get",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{op="get",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{op="get"} 3' in lines
+    assert 'latency_seconds_sum{op="get"} 5.55' in lines
+
+
+def test_registry_render():
+    registry = Registry()
+    counter = registry.register(Counter("sent_total", "Sent", ("task",)))
+    counter.inc("email")
+    counter.inc("email", amount=2)
+
+    text = registry.render()
+    assert "# TYPE sent_total counter" in text
+    assert 'sent_total{task="email"} 3' in text
+
+
+def test_registries_sharing_a_directory_render_the_sum(tmp_path, monkeypatch):
+    workers = []
+    for pid in (101, 102):
+        registry = Registry(str(tmp_path))
+        counter = registry.register(Counter("sent_total", "Sent", ("task",)))
+        histogram = registry.register(
+            Histogram("latency_seconds", "Latency", (), (0.1,))
+        )
+        counter.inc("email", amount=pid - 100)
+        histogram.observe(0.05)
+        monkeypatch.setattr("os.getpid", lambda pid=pid: pid)
+        registry.dump()
+        workers.append(registry)
+
+    monkeypatch.setattr("os.getpid", lambda: 101)
+    text = workers[0].render()
+    assert 'sent_total{task="email"} 3' in text
+    assert 'latency_seconds_bucket{le="0.1"} 2' in text
+    # Rendering twice must not count anything twice.
+    assert workers[0].render() == text
@@ -3,14 +3,13 @@ import pytest_asyncio
 import sqlalchemy
 from sqlalchemy import select
 
-from src.database import _engine as engine
-from src.database import get_session
+from src.database import get_engine, get_session
 from src.model import Base, User
 
 
 @pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def refresh_db():
-    async with engine.begin() as conn:
+    async with get_engine().begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
 
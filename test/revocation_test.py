@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import pytest
+from fakeredis import FakeAsyncRedis
+from redis.exceptions import RedisError
+
+from src.auth import transport as transport_module
+from src.auth.revocation import Revocations, RevocationState
+from src.auth.schema.token import JWTTokenPayload
+from src.auth.transport import RedisTransport
+
+
+def make_token(ks: str = "ks", iat: int | None = None) -> JWTTokenPayload:
+    iat = int(time.time()) if iat is None else iat
+    return JWTTokenPayload(
+        iss="authserver",
+        sub="user",
+        exp=iat + 60,
+        iat=iat,
+        ag="agent",
+        ks=ks,
+    )
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    monkeypatch.setattr(
+        transport_module, "_redis", FakeAsyncRedis(decode_responses=True)
+    )
+    return RedisTransport()
+
+
+def test_stale_state_defers_to_redis():
+    state = RevocationState(retention=60, max_staleness=1)
+    assert state.check(make_token()) is None
+
+    state.touch()
+    assert state.check(make_token()) is True
+
+
+def test_user_cutoff_is_ambiguous_within_the_same_second():
+    state = RevocationState(retention=60, max_staleness=1)
+    state.touch()
+    now = time.time()
+    state.apply("u:user", now)
+
+    assert state.check(make_token(iat=int(now) - 1)) is False
+    assert state.check(make_token(iat=int(now))) is None
+    assert state.check(make_token(iat=int(now) + 1)) is True
+
+
+@pytest.mark.asyncio
+async def test_revocations_reach_other_workers(transport):
+    publisher = Revocations(transport, RevocationState(60, 1))
+    await publisher.revoke_session(make_token("before-start"))
+
+    worker = Revocations(transport, RevocationState(60, 1))
+    worker.start()
+    try:
+        for _ in range(100):
+            if worker.state.is_fresh():
+                break
+            await asyncio.sleep(0.01)
+        assert worker.check(make_token("before-start")) is False
+        assert worker.check(make_token("live")) is True
+
+        await publisher.revoke_session(make_token("live"))
+        for _ in range(100):
+            if worker.check(make_token("live")) is False:
+                break
+            await asyncio.sleep(0.01)
+        assert worker.check(make_token("live")) is False
+    finally:
+        await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_listener_skips_malformed_messages(transport):
+    worker = Revocations(transport, RevocationState(60, 1))
+    worker.start()
+    try:
+        for _ in range(100):
+            if worker.state.is_fresh():
+                break
+            await asyncio.sleep(0.01)
+        publisher = Revocations(transport, RevocationState(60, 1))
+        await transport.redis.publish(worker.channel, "s:broken not-a-time")
+        await publisher.revoke_session(make_token("live"))
+        for _ in range(100):
+            if worker.check(make_token("live")) is False:
+                break
+            await asyncio.sleep(0.01)
+        assert worker.check(make_token("live")) is False
+        assert not worker._task.done()
+    finally:
+        await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_publish_is_not_applied_locally(transport, monkeypatch):
+    async def fail(*args):
+        raise RedisError("down")
+
+    revocations = Revocations(transport, RevocationState(60, 1))
+    revocations.state.touch()
+    monkeypatch.setattr(transport, "publish_revocation", fail)
+
+    with pytest.raises(RedisError):
+        await revocations.revoke_session(make_token("live"))
+    assert revocations.check(make_token("live")) is True
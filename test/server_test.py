@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+from src.server import available_cpus
+
+
+@pytest.mark.parametrize(
+    ("cpu_max", "expected"),
+    [
+        ("max 100000\n", 8),
+        ("200000 100000\n", 2),
+        ("150000 100000\n", 2),
+        ("50000 100000\n", 1),
+        ("1600000 100000\n", 8),
+        ("garbage\n", 8),
+    ],
+)
+def test_available_cpus_honours_the_cgroup_quota(
+    tmp_path, monkeypatch, cpu_max, expected
+):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)))
+    path = tmp_path / "cpu.max"
+    path.write_text(cpu_max)
+
+    assert available_cpus(str(path)) == expected
+
+
+def test_available_cpus_without_cgroup(tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 1})
+
+    assert available_cpus(str(tmp_path / "missing")) == 2
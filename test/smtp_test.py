@@ -0,0 +1,91 @@
+import smtplib
+from collections import deque
+
+import pytest
+
+from src.email_celery import smtp
+from src.email_celery.smtp import SMTPPool
+
+
+class FakeSMTP:
+    connections = 0
+    drop_after: int | None = None
+    refuse: set[str] = set()
+
+    def __init__(self, host, port):
+        FakeSMTP.connections += 1
+        self.sent = []
+
+    def login(self, user, password):
+        pass
+
+    def noop(self):
+        return (250, b"OK")
+
+    def sendmail(self, sender, recipient, message):
+        if recipient in FakeSMTP.refuse:
+            raise smtplib.SMTPRecipientsRefused({recipient: (550, b"no")})
+        if FakeSMTP.drop_after is not None and len(self.sent) == (
+            FakeSMTP.drop_after
+        ):
+            raise smtplib.SMTPServerDisconnected()
+        self.sent.append(recipient)
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def make_pool(monkeypatch):
+    FakeSMTP.connections = 0
+    FakeSMTP.drop_after = None
+    FakeSMTP.refuse = set()
+    monkeypatch.setattr(smtp.smtplib, "SMTP_SSL", FakeSMTP)
+    return SMTPPool("smtp", "465", "user", "password", size=2, max_idle=30)
+
+
+def test_connection_is_reused(monkeypatch):
+    pool = make_pool(monkeypatch)
+
+    pool.send("a@a.com", "message")
+    pool.send("b@b.com", "message")
+
+    assert FakeSMTP.connections == 1
+
+
+def test_batch_reconnects_on_disconnect(monkeypatch):
+    pool = make_pool(monkeypatch)
+    FakeSMTP.drop_after = 2
+
+    pending = deque((f"{i}@a.com", "message") for i in range(3))
+    sent = pool.send_many(pending)
+
+    assert sent == 3
+    assert not pending
+    assert FakeSMTP.connections == 2
+
+
+def test_refused_recipient_is_not_resent(monkeypatch):
+    pool = make_pool(monkeypatch)
+    FakeSMTP.refuse = {"bad@a.com"}
+
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        pool.send("bad@a.com", "message")
+
+    # Sent once, and the connection went back to the pool.
+    assert FakeSMTP.connections == 1
+    assert pool._idle.qsize() == 1
+
+    pool.send("a@a.com", "message")
+    assert FakeSMTP.connections == 1
+
+
+def test_unexpected_error_drops_connection(monkeypatch):
+    pool = make_pool(monkeypatch)
+
+    with pytest.raises(RuntimeError), pool.connection():
+        raise RuntimeError()
+
+    assert pool._idle.empty()
@@ -0,0 +1,25 @@
+from src.email_celery.template import CompiledTemplate, get_template
+from src.email_celery.util import generate_email
+
+
+def test_render_named_slots():
+    template = CompiledTemplate("|greeting|, your code is |token|.")
+
+    assert template.slots == {"greeting", "token"}
+    assert (
+        template.render({"greeting": "Hi", "token": "123456"})
+        == "Hi, your code is 123456."
+    )
+
+
+def test_templates_are_compiled_once():
+    assert get_template("confirm_email") is get_template("confirm_email")
+    assert get_template("reset_password").html.slots == {"token"}
+
+
+def test_generate_email():
+    msg = generate_email("a@a.com", "reset_password", {"token": "123456"})
+
+    assert msg["To"] == "a@a.com"
+    assert msg["Subject"] == "Reset your password"
+    assert "123456" in msg.as_string()
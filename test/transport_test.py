@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from src.auth import transport as transport_module
+from src.auth.transport import RedisTransport
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    monkeypatch.setattr(
+        transport_module, "_redis", FakeAsyncRedis(decode_responses=True)
+    )
+    return RedisTransport()
+
+
+@pytest.mark.asyncio
+async def test_rotate_only_once(transport):
+    await transport.set("user", "agent", "old")
+
+    results = await asyncio.gather(
+        transport.rotate("user", "agent", "old", "new-1"),
+        transport.rotate("user", "agent", "old", "new-2"),
+    )
+
+    assert sorted(results) == [False, True]
+    assert await transport.get("user", "agent") in ("new-1", "new-2")
+
+
+@pytest.mark.asyncio
+async def test_verify_and_revoke(transport):
+    await transport.set("user", "agent", "token", expire_time=10)
+
+    assert await transport.verify("user", "agent", "token", touch=100)
+    assert await transport.redis.ttl("sessions:user") > 10
+    assert not await transport.verify("user", "agent", "other")
+
+    assert not await transport.revoke("user", "agent", "other")
+    assert await transport.revoke("user", "agent", "token")
+    assert await transport.get("user", "agent") is None
+
+
+@pytest.mark.asyncio
+async def test_sessions_are_indexed_per_user(transport):
+    await transport.set("user", "agent-1", "token-1")
+    await transport.set("user", "agent-2", "token-2", expire_time=1)
+    await transport.set("other", "agent-1", "token-3")
+
+    assert len(await transport.sessions("user")) == 2
+    assert await transport.revoke_all("user")
+    assert await transport.sessions("user") == {}
+    assert await transport.get("other", "agent-1") == "token-3"
+
+
+@pytest.mark.asyncio
+async def test_hit_counts_only_allowed_requests(transport):
+    limits = {"rl:ip": (2, 60), "rl:email": (5, 60)}
+
+    assert await transport.hit(limits) == 0
+    assert await transport.hit(limits) == 0
+    assert await transport.hit(limits) > 0
+    assert await transport.hit({"rl:email": (5, 60)}) == 0
+
+
+@pytest.mark.asyncio
+async def test_get_many_reads_sessions_in_one_pipeline(transport):
+    await transport.set("user", "agent-1", "token-1")
+    await transport.set("other", "agent-1", "token-2")
+
+    assert await transport.get_many(
+        [("user", "agent-1"), ("user", "agent-2"), ("other", "agent-1")]
+    ) == ["token-1", None, "token-2"]
+    assert await transport.get_many([]) == []
+
+
+@pytest.mark.asyncio
+async def test_hit_only_touches_declared_bucket_keys(transport):
+    await transport.hit({"rl:{route}:ip": (2, 60)})
+
+    keys = await transport.redis.keys("rl:*")
+    index = int(time.time() // 60)
+    assert keys in (
+        [f"rl:{{route}}:ip:{index}"],
+        [f"rl:{{route}}:ip:{index - 1}"],
+    )
@@ -0,0 +1,136 @@
+import io
+from contextlib import asynccontextmanager
+
+import pytest
+
+from src import user_import
+from src.user_import import chunked, import_users, read_rows
+
+
+class FakeConnection:
+    def __init__(self, existing: set[str]) -> None:
+        self.existing = existing
+        self.staged: list[tuple] = []
+        self.closed = False
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+        self.staged = []
+
+    async def execute(self, query: str) -> None:
+        assert "CREATE TEMP TABLE user_import" in query
+
+    async def copy_records_to_table(self, table, records, columns) -> None:
+        assert table == "user_import"
+        self.staged.extend(records)
+
+    async def fetch(self, query: str) -> list[dict]:
+        # ON CONFLICT (email) DO NOTHING RETURNING email
+        assert "ON CONFLICT (email) DO NOTHING" in query
+        inserted = []
+        for _, email, _, password in self.staged:
+            assert password == f"hashed:{email}"
+            if email not in self.existing:
+                self.existing.add(email)
+                inserted.append({"email": email})
+        return inserted
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    conn = FakeConnection({"taken@a.com"})
+
+    async def connect(*args, **kwargs):
+        return conn
+
+    async def hash_passwords(pool, passwords):
+        return [password.replace("pw:", "hashed:") for password in passwords]
+
+    monkeypatch.setattr(user_import.asyncpg, "connect", connect)
+    monkeypatch.setattr(user_import, "_hash_passwords", hash_passwords)
+    return conn
+
+
+def user(email: str) -> str:
+    return (
+        f'{{"email": "{email}", "first_name": "A", "password": "pw:{email}"}}'
+    )
+
+
+def test_read_rows_skips_blank_lines_and_marks_bad_ones():
+    file = io.StringIO(
+        "\n".join(
+            [
+                user("a@a.com"),
+                "",
+                "{not json",
+                "[1, 2]",
+                '"a"',
+                user("b@b.com"),
+            ]
+        )
+    )
+
+    rows = list(read_rows(file, "ndjson"))
+
+    assert [row and row["email"] for row in rows] == [
+        "a@a.com",
+        None,
+        None,
+        None,
+        "b@b.com",
+    ]
+
+
+def test_read_rows_csv():
+    file = io.StringIO("email,first_name,password\na@a.com,A,12345678\n")
+
+    assert list(read_rows(file, "csv")) == [
+        {"email": "a@a.com", "first_name": "A", "password": "12345678"}
+    ]
+
+
+def test_chunked():
+    chunks = list(chunked(iter(range(5)), 2))
+
+    assert chunks == [[0, 1], [2, 3], [4]]
+
+
+@pytest.mark.asyncio
+async def test_import_counts_invalid_and_duplicate_rows(conn):
+    file = io.StringIO(
+        "\n".join(
+            [
+                # In-file duplicate within one chunk, then one already in
+                # the table.
+                user("a@a.com"),
+                user("a@a.com"),
+                "{not json",
+                user("not an email"),
+                user("taken@a.com"),
+                user("b@b.com"),
+                "[]",
+                user("c@c.com"),
+            ]
+        )
+    )
+    duplicates = io.StringIO()
+
+    report = await import_users(file, "ndjson", duplicates, chunk_size=3)
+
+    assert report.as_dict() == {
+        "total": 8,
+        "inserted": 3,
+        "duplicates": 2,
+        "invalid": 3,
+    }
+    assert sorted(duplicates.getvalue().split()) == [
+        "a@a.com",
+        "taken@a.com",
+    ]
+    assert conn.existing == {"taken@a.com", "a@a.com", "b@b.com", "c@c.com"}
+    assert conn.closed